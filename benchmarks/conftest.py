@@ -0,0 +1,131 @@
+# conftest.py — Shared fixtures for the benchmark suite
+#
+# Synthetic data is generated from a fixed seed so numbers are comparable
+# across commits. Real label photos can be dropped into benchmarks/fixtures/
+# (.png/.jpg) and are picked up by the OCR scenarios automatically.
+import glob
+import io
+import os
+import random
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+DB_SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+_SYLLABLES = [
+    "so", "di", "um", "ben", "zo", "ate", "as", "par", "ta", "me", "glu", "ca", "pot",
+    "as", "si", "sor", "bic", "cit", "ric", "lac", "tose", "mal", "to", "dex", "trin",
+    "xan", "than", "gum", "pec", "tin", "phos", "phate", "car", "bon", "ni", "tr",
+]
+_CATEGORIES = ["Preservative", "Sweetener", "Colour", "Emulsifier", "Analgesic", "Antibiotic", "Food Additive"]
+_SIDE_EFFECTS = ["Minimal", "Stomach upset", "Allergic reactions", "Obesity", "High sodium", "Headache"]
+
+
+# -------------------------------
+# Synthetic Data Builders
+# -------------------------------
+def _name(rng):
+    words = []
+    for _ in range(rng.choice([1, 1, 2, 2, 3])):
+        word = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+        words.append(word.capitalize())
+    return " ".join(words)
+
+
+def make_ingredient_db(n, seed=42):
+    """Ingredient DataFrame with the same columns as data/items.csv."""
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "Ingredient": [_name(rng) for _ in range(n)],
+        "Category": [rng.choice(_CATEGORIES) for _ in range(n)],
+        "Possible Side Effects": [rng.choice(_SIDE_EFFECTS) for _ in range(n)],
+        "Prescription Required": [rng.choice(["Yes", "No", "No", "No"]) for _ in range(n)],
+    })
+
+
+def _typo(word, rng):
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:]
+
+
+def make_tokens(db, n=40, seed=7):
+    """Realistic token mix: exact names, OCR-style typos and unknown noise."""
+    rng = random.Random(seed)
+    names = db["Ingredient"].tolist()
+    tokens = []
+    for i in range(n):
+        kind = i % 4
+        if kind == 0:
+            tokens.append(rng.choice(names))
+        elif kind in (1, 2):
+            tokens.append(_typo(rng.choice(names), rng))
+        else:
+            tokens.append(_name(rng).lower())
+    return tokens
+
+
+def make_ocr_results(tokens, per_line=4, seed=3):
+    """extract_text-shaped output: comma/slash joined lines with confidences."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(0, len(tokens), per_line):
+        sep = rng.choice([", ", " / ", ","])
+        lines.append({"text": sep.join(tokens[i:i + per_line]), "confidence": round(rng.uniform(40, 99), 2)})
+    return lines
+
+
+def render_label(tokens, width=900):
+    """Render a synthetic ingredients label as PNG bytes."""
+    from PIL import Image, ImageDraw
+
+    text_lines = ["INGREDIENTS:"]
+    line = ""
+    for tok in tokens:
+        candidate = f"{line}, {tok}" if line else tok
+        if len(candidate) > 60:
+            text_lines.append(line)
+            line = tok
+        else:
+            line = candidate
+    text_lines.append(line)
+
+    img = Image.new("RGB", (width, 40 + 28 * len(text_lines)), "white")
+    draw = ImageDraw.Draw(img)
+    for i, t in enumerate(text_lines):
+        draw.text((20, 20 + 28 * i), t, fill="black")
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+# -------------------------------
+# Fixtures
+# -------------------------------
+@pytest.fixture(scope="session", params=list(DB_SIZES), ids=list(DB_SIZES))
+def ingredient_db(request):
+    return make_ingredient_db(DB_SIZES[request.param])
+
+
+@pytest.fixture(scope="session")
+def small_db():
+    return make_ingredient_db(DB_SIZES["1k"])
+
+
+@pytest.fixture(scope="session")
+def label_images(small_db):
+    """Synthetic labels plus any real photos in benchmarks/fixtures/."""
+    images = {"synthetic-short": render_label(make_tokens(small_db, 12)),
+              "synthetic-long": render_label(make_tokens(small_db, 60))}
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.png")) + glob.glob(os.path.join(FIXTURE_DIR, "*.jp*g"))):
+        with open(path, "rb") as f:
+            images[os.path.basename(path)] = f.read()
+    return images
@@ -0,0 +1,29 @@
+# Analysis scenarios: matched records → display DataFrame
+import pytest
+
+from src.analyzer import analyze_ingredients
+from src.matcher import MatchedRows, MatchResult
+
+
+@pytest.mark.parametrize("n_items", [10, 100, 1000])
+def test_analyze_ingredients(benchmark, small_db, n_items):
+    matched_items = small_db.head(n_items).to_dict("records")
+    df = benchmark(analyze_ingredients, matched_items)
+    assert len(df) == n_items
+
+
+@pytest.mark.parametrize("n_items", [10, 100, 1000])
+def test_analyze_matched_rows(benchmark, small_db, n_items):
+    # What the matcher hands the analyzer: row labels into the shared DB
+    results = [MatchResult(name, score=100.0, row=label, db=small_db)
+               for label, name in small_db["Ingredient"].head(n_items).items()]
+    df = benchmark(lambda: analyze_ingredients(MatchedRows.from_results(results)))
+    assert len(df) == n_items
+
+
+def test_analyze_matched_rows_by_db_size(benchmark, ingredient_db):
+    # A 40-ingredient label should cost the same against a 1k or a 100k-row DB
+    results = [MatchResult(name, score=100.0, row=label, db=ingredient_db)
+               for label, name in ingredient_db["Ingredient"].head(40).items()]
+    df = benchmark(lambda: analyze_ingredients(MatchedRows.from_results(results)))
+    assert len(df) == 40
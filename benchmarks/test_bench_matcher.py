@@ -0,0 +1,36 @@
+# Matching scenarios against synthetic 1k / 10k / 100k row ingredient DBs
+import pytest
+
+from conftest import make_tokens
+from src.matcher import match_candidates, match_ingredients, match_tokens
+
+
+@pytest.mark.parametrize("n_tokens", [10, 50])
+def test_match_ingredients(benchmark, ingredient_db, n_tokens):
+    tokens = make_tokens(ingredient_db, n_tokens)
+    match_tokens(tokens[:1], ingredient_db)  # build the choice index outside the timing
+    matched = benchmark.pedantic(match_ingredients, args=(tokens, ingredient_db), rounds=5, iterations=1)
+    assert matched
+
+
+def test_match_single_token(benchmark, ingredient_db):
+    token = make_tokens(ingredient_db, 2)[1]
+    match_tokens([token], ingredient_db)
+    benchmark.pedantic(match_tokens, args=([token], ingredient_db), rounds=10, iterations=1)
+
+
+def test_match_candidates_top5(benchmark, ingredient_db):
+    tokens = make_tokens(ingredient_db, 50)
+    match_tokens(tokens[:1], ingredient_db)
+    results = benchmark.pedantic(match_candidates, args=(tokens, ingredient_db),
+                                 kwargs={"k": 5}, rounds=5, iterations=1)
+    assert any(r.candidates for r in results)
+
+
+def test_match_devanagari_tokens(benchmark, ingredient_db):
+    # Hindi/Marathi label text goes through the transliteration index, not the Latin cdist
+    tokens = ["सोडियम बेंजोएट", "चीनी", "नमक", "मोनोसोडियम ग्लूटामेट", "पाम तेल"] * 4
+    match_candidates(tokens[:1], ingredient_db)  # build the Devanagari index outside the timing
+    results = benchmark.pedantic(match_candidates, args=(tokens, ingredient_db),
+                                 rounds=5, iterations=1)
+    assert len(results) == len(tokens)
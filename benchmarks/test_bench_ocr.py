@@ -0,0 +1,22 @@
+# OCR scenarios: extract_text on synthetic labels and any photos in fixtures/
+import glob
+import io
+import os
+
+import pytest
+
+pytest.importorskip("easyocr")
+
+FIXTURES = sorted(
+    os.path.basename(p) for p in glob.glob(os.path.join(os.path.dirname(__file__), "fixtures", "*"))
+    if p.lower().endswith((".png", ".jpg", ".jpeg"))
+)
+
+
+@pytest.mark.parametrize("image_name", ["synthetic-short", "synthetic-long", *FIXTURES])
+def test_extract_text(benchmark, label_images, image_name):
+    from src.ocr_utils import extract_text
+
+    data = label_images[image_name]
+    extract_text(io.BytesIO(data))  # warm the reader
+    benchmark.pedantic(lambda: extract_text(io.BytesIO(data)), rounds=3, iterations=1)
@@ -0,0 +1,19 @@
+# Tokenization scenarios (Home page "Read Text" and "Check Ingredients" paths)
+import pytest
+
+from conftest import make_ocr_results, make_tokens
+from src.tokenizer import tokenize_ocr_results, tokenize_text
+
+
+@pytest.mark.parametrize("n_tokens", [20, 200, 2000])
+def test_tokenize_ocr_results(benchmark, small_db, n_tokens):
+    results = make_ocr_results(make_tokens(small_db, n_tokens))
+    tokens = benchmark(tokenize_ocr_results, results)
+    assert tokens
+
+
+@pytest.mark.parametrize("n_tokens", [20, 200, 2000])
+def test_tokenize_text(benchmark, small_db, n_tokens):
+    text = "\n".join(", ".join(chunk) for chunk in zip(*[iter(make_tokens(small_db, n_tokens))] * 4))
+    tokens = benchmark(tokenize_text, text)
+    assert tokens
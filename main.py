@@ -4,6 +4,8 @@ import streamlit as st
 import streamlit.components.v1 as components
 from PIL import Image
 
+from src.preload import start_preload
+
 # -------------------------------
 # Streamlit Config
 # -------------------------------
@@ -13,6 +15,11 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# -------------------------------
+# Warm OCR / matcher in the background (once per server process)
+# -------------------------------
+start_preload()
+
 # -------------------------------
 # Disable Back Button
 # -------------------------------
@@ -1,6 +1,7 @@
 # app.py — Viveka (User-friendly UI with Matcher & Analyzer)
 import streamlit as st
-import os, sys
+import io, os, sys
+from datetime import datetime
 from PIL import Image
 
 # -------------------------------
@@ -33,8 +34,22 @@ if SRC not in sys.path:
 # Imports from src
 # -------------------------------
 from src.ocr_utils import extract_text
-from src.matcher import match_ingredients, df as ingredient_df
-from src.analyzer import analyze_ingredients, display_analysis
+from src.barcode import product_tokens, scan_barcode
+from src.matcher import MatchedRows, MatchResult, coalescer, match_candidates, get_db_snapshot, start_db_watcher
+from src.analyzer import analysis_frame, analyze_ingredients, display_analysis, display_token_list
+from src.profile_store import get_profile
+from src.tokenizer import replace_token, tokenize_ocr_lines, tokenize_text
+from src import metrics
+from src.profiling import PROFILE_ALWAYS, profile_scan
+from src.result_cache import SUGGEST_BELOW_SCORE, cached_rows, clean_rows, get_result_cache, product_key, store_rows
+from src.history import record_scan, user_scans
+from src import analytics
+
+# Pick up edits to data/items.csv without a restart (one watcher per process)
+start_db_watcher()
+
+# Cached per process; refreshed by save_profile on the Profile page
+user_profile = get_profile(st.session_state["username"]) if st.session_state.get("username") else None
 
 # -------------------------------
 # Profile Reminder Notification (first time only)
@@ -42,7 +57,7 @@ from src.analyzer import analyze_ingredients, display_analysis
 if "profile_popup_shown" not in st.session_state:
     st.session_state["profile_popup_shown"] = False
 
-if not st.session_state["profile_popup_shown"]:
+if not st.session_state["profile_popup_shown"] and user_profile is None:
     st.markdown(
         """
         <div style="position:fixed; top:20px; right:20px; background:#222; padding:20px;
@@ -68,6 +83,171 @@ if not st.session_state["profile_popup_shown"]:
 st.sidebar.title("Viveka")
 menu = st.sidebar.radio("Navigate", ["Home", "History", "Profile"])
 
+# Stage timing panel (VIVEKA_METRICS=1; admins, or anyone with VIVEKA_METRICS_PANEL=1)
+if metrics.is_enabled() and (st.session_state.get("role") == "admin"
+                             or os.environ.get("VIVEKA_METRICS_PANEL") == "1"):
+    with st.sidebar.expander("⏱ Stage timings"):
+        rows = metrics.snapshot()
+        if rows:
+            st.dataframe(rows, hide_index=True)
+        else:
+            st.caption("No scans timed yet.")
+
+# One-shot cProfile capture of the next scan (admins only; VIVEKA_PROFILE=1 profiles every scan).
+# The note is filled in at the end of the run, after a scan in this run may have used the request.
+profile_note = None
+if st.session_state.get("role") == "admin":
+    if st.sidebar.button("🧪 Profile next scan", key="profile_next_btn"):
+        st.session_state["profile_next_scan"] = True
+    profile_note = st.sidebar.empty()
+
+
+def _take_profile_request():
+    return st.session_state.pop("profile_next_scan", False)
+
+
+def _scan_meta():
+    return {"username": st.session_state.get("username")}
+
+
+MATCH_THRESHOLD = 80
+# Matched tokens scoring below SUGGEST_BELOW_SCORE still get "Did you mean?" alternatives
+SUGGESTIONS_K = 3
+
+
+def _rematch(tokens, direct=False):
+    """
+    Match only tokens not seen on the previous check and patch the analysis.
+    Keeps token -> MatchResult (a row label into the shared DB) in session
+    state; the map is reset whenever a new version of the ingredient DB is
+    swapped in.
+    :return: (analysis DataFrame, number of tokens sent to the matcher)
+    """
+    db, version = get_db_snapshot()
+    if st.session_state.get("match_db_version") != version:
+        st.session_state["match_map"] = {}
+        st.session_state["match_db_version"] = version
+    match_map = st.session_state["match_map"]
+
+    new_tokens = [t for t in tokens if t not in match_map]
+    if new_tokens:
+        # OCR confidence of tokens read from the photo; typed/edited tokens have none
+        token_conf = st.session_state.get("token_confidence", {})
+        confidences = [token_conf.get(t) for t in new_tokens]
+        # A profiled scan matches in this thread so cProfile sees the work.
+        match_fn = match_candidates if direct else coalescer.match_candidates
+        for res in match_fn(new_tokens, db, MATCH_THRESHOLD, k=SUGGESTIONS_K, confidences=confidences):
+            match_map[res.token] = res
+
+    # Forget tokens the user deleted so the map tracks the current text only
+    current = set(tokens)
+    for tok in [t for t in match_map if t not in current]:
+        del match_map[tok]
+
+    matched = MatchedRows.from_results([match_map[t] for t in tokens], db)
+    return analyze_ingredients(matched), len(new_tokens)
+
+
+def _apply_correction(old, new, row):
+    """
+    on_click for a suggestion: swap the token in the text and re-run the check.
+    The chosen candidate is already a DB row, so it is seeded into the match map
+    and the follow-up check matches nothing new.
+    """
+    text = replace_token(st.session_state.get("manual_text", ""), old, new)
+    st.session_state["manual_text"] = text
+    # Drop the widget's own state so the text area picks up the corrected value
+    st.session_state.pop("manual_input_area", None)
+
+    # `row` is a label in the DB version the suggestion came from; after a
+    # reload the follow-up check simply matches the corrected token.
+    db, version = get_db_snapshot()
+    if st.session_state.get("match_db_version") == version:
+        st.session_state.setdefault("match_map", {})[new] = MatchResult(new, None, 100.0, row=row, db=db)
+    st.session_state["auto_check"] = True
+
+
+def _check(tokens, direct=False):
+    """
+    Analysis for the checked tokens: from the shared product cache when this
+    exact ingredient list was analysed before (by anyone), else via _rematch.
+    Lists with anything to suggest are never cached (see store_rows), so a hit
+    has no corrections to show.
+    :return: (analysis DataFrame, tokens sent to the matcher, cache hit)
+    """
+    token_conf = st.session_state.get("token_confidence", {})
+    cache = get_result_cache()
+    key = None
+    if cache is not None and tokens:
+        key = product_key(tokens, MATCH_THRESHOLD, [token_conf.get(t) for t in tokens])
+        rows = cached_rows(cache, key, tokens)
+        if rows is not None:
+            return analysis_frame(rows), 0, True
+
+    analysis_df, n_new = _rematch(tokens, direct=direct)
+    if key is not None:
+        match_map = st.session_state["match_map"]
+        store_rows(cache, key, tokens, clean_rows(analysis_df), [match_map[t] for t in tokens])
+    return analysis_df, n_new, False
+
+
+def _suggestion_targets(tokens):
+    """(token, MatchResult, candidate options) for unmatched and low-scoring tokens."""
+    match_map = st.session_state.get("match_map", {})
+    flagged = []
+    for tok in tokens:
+        if tok not in match_map:  # analysis came from the product cache
+            continue
+        res = match_map[tok]
+        if res.matched and res.score >= SUGGEST_BELOW_SCORE:
+            continue
+        options = [c for c in res.candidates if c["ingredient"] != tok]
+        if options:
+            flagged.append((tok, res, options))
+    return flagged
+
+
+def _render_suggestions(tokens):
+    """One-click corrections for unmatched and low-scoring tokens."""
+    flagged = _suggestion_targets(tokens)
+    if not flagged:
+        return
+
+    st.subheader("🔁 Did you mean?")
+    for i, (tok, res, options) in enumerate(flagged):
+        if res.matched:
+            st.markdown(f"**{tok}** — matched *{res.item.get('Ingredient')}* ({res.score:.0f}%)")
+        else:
+            st.markdown(f"**{tok}** — not found")
+        for j, c in enumerate(options):
+            st.button(f"{c['ingredient']} ({c['combined']:.0f}%)", key=f"fix_{i}_{j}",
+                      on_click=_apply_correction, args=(tok, c["ingredient"], c["row"]))
+
+
+def _record(tokens, analysis_df):
+    """Append this check to the user's scan history (photo/barcode origin if the list came from one)."""
+    origin = st.session_state.get("scan_origin")
+    if not origin or not origin["tokens"] & set(tokens):
+        origin = {"source": "manual", "barcode": None, "label": None}
+    record_scan(st.session_state.get("username"), tokens, analysis_df,
+                source=origin["source"], barcode=origin["barcode"], label=origin["label"])
+
+
+def _render_check(result):
+    """Final token list, editable analysis table and suggestions for one check."""
+    st.subheader("🔎 Final Ingredient List")
+    display_token_list(result["tokens"])
+    if result["note"]:
+        st.caption(result["note"])
+
+    # --- Display Editable Table (paginated for long lists) ---
+    edited_df = display_analysis(result["analysis"])
+    st.session_state["final_analysis"] = edited_df
+
+    # --- One-click corrections (from the same matching pass) ---
+    _render_suggestions(result["tokens"])
+
+
 # Redirect sidebar Profile to profile.py
 if menu == "Profile":
     try:
@@ -107,39 +287,42 @@ if menu == "Home":
             st.image(uploaded_file, caption="Uploaded photo", width="stretch")
 
             if st.button("🔍 Read Text", key="read_btn"):
-                with st.spinner("Scanning photo for text..."):
-                    try:
-                        results = extract_text(uploaded_file)
-                    except Exception as e:
-                        st.error(f"Could not read text: {e}")
+                with st.spinner("Scanning photo for text..."), metrics.span("app.read_text"), \
+                        profile_scan("ocr", uploaded_file.getvalue(), filename=uploaded_file.name,
+                                     capture=_take_profile_request(), meta=_scan_meta()) as scan:
+                    # A barcode found in the local OpenFoodFacts store skips OCR
+                    code, product = scan_barcode(io.BytesIO(uploaded_file.getvalue()))
+                    if product is not None:
+                        st.success(f"📦 Barcode {code}: {product['name'] or 'Unnamed product'}"
+                                   + (f" ({product['brand']})" if product["brand"] else ""))
                         results = []
+                        tokens = product_tokens(product)
+                        confidences = [None] * len(tokens)
+                        origin = {"source": "barcode", "barcode": code, "label": product["name"] or None}
+                    else:
+                        try:
+                            results = extract_text(uploaded_file)
+                        except Exception as e:
+                            st.error(f"Could not read text: {e}")
+                            results = []
+                        # Process OCR text into unique tokens (with their line confidence)
+                        tokens, confidences = tokenize_ocr_lines(results)
+                        origin = {"source": "ocr", "barcode": None, "label": None}
 
                     st.session_state["ocr_results"] = results
 
-                    # Process OCR text into unique tokens
-                    lines = [r["text"].strip() for r in results if r.get("text")]
-                    seen = set()
-                    uniq_lines = []
-                    for ln in lines:
-                        if ln and ln.lower() not in seen:
-                            seen.add(ln.lower())
-                            uniq_lines.append(ln)
-
-                    tokens = []
-                    for line in uniq_lines:
-                        parts = [p.strip() for p in line.replace("/", ",").split(",") if p.strip()]
-                        for p in parts:
-                            if p.lower() not in [t.lower() for t in tokens]:
-                                tokens.append(p)
-
                     st.session_state["ingredient_list"] = tokens
+                    st.session_state["token_confidence"] = dict(zip(tokens, confidences))
                     st.session_state["manual_text"] = "\n".join(tokens)
+                    st.session_state["scan_origin"] = {**origin, "tokens": set(tokens)}
+
+                if scan.artifact:
+                    st.caption(f"🧪 Profile saved to `{scan.artifact}` ({scan.elapsed_ms} ms)")
 
         if st.session_state["ingredient_list"]:
             st.subheader("✅ Detected Ingredients")
             st.write("We found these ingredients from the photo:")
-            for i, ing in enumerate(st.session_state["ingredient_list"], 1):
-                st.write(f"{i}. {ing}")
+            display_token_list(st.session_state["ingredient_list"])
 
     # ---- Right Column: Manual Input + Analysis ----
     with col2:
@@ -153,35 +336,81 @@ if menu == "Home":
         )
         st.session_state["manual_text"] = manual_val
 
-        if st.button("✅ Check Ingredients", key="analyze_btn"):
+        # A suggestion click (see _apply_correction) re-runs the check automatically
+        auto_check = st.session_state.pop("auto_check", False)
+        if st.button("✅ Check Ingredients", key="analyze_btn") or auto_check:
             if not manual_val.strip():
                 st.warning("Please enter or upload some ingredients first.")
             else:
-                # Split manual input into clean list
-                parts = []
-                for line in manual_val.splitlines():
-                    for tok in line.split(","):
-                        t = tok.strip()
-                        if t and t.lower() not in [p.lower() for p in parts]:
-                            parts.append(t)
-
-                st.subheader("🔎 Final Ingredient List")
-                for i, p in enumerate(parts, 1):
-                    st.write(f"{i}. {p}")
+                capture = _take_profile_request()
+                with metrics.span("app.check_ingredients"), \
+                        profile_scan("match", manual_val, capture=capture, meta=_scan_meta()) as scan:
+                    # Split manual input into clean list
+                    parts = tokenize_text(manual_val)
 
-                # --- Matcher ---
-                matched_items = match_ingredients(parts, ingredient_df)
+                    # --- Matcher + Analyzer (cached per product; otherwise only new/edited
+                    #     tokens are re-matched, batched with other sessions' checks) ---
+                    analysis_df, n_rematched, cache_hit = _check(parts, direct=capture or PROFILE_ALWAYS)
+                    if cache_hit:
+                        note = "⚡ This ingredient list was analysed before — loaded from cache."
+                    elif n_rematched < len(parts):
+                        note = f"Re-checked {n_rematched} changed of {len(parts)} ingredients."
+                    else:
+                        note = None
+                    st.session_state["check_result"] = {"tokens": parts, "analysis": analysis_df, "note": note}
+                    if not auto_check:  # a suggestion re-check is the same scan, already recorded
+                        _record(parts, analysis_df)
+                    _render_check(st.session_state["check_result"])
 
-                # --- Analyzer ---
-                analysis_df = analyze_ingredients(matched_items)
-
-                # --- Display Editable Table ---
-                edited_df = display_analysis(analysis_df)
-                st.session_state["final_analysis"] = edited_df
+                if scan.artifact:
+                    st.caption(f"🧪 Profile saved to `{scan.artifact}` ({scan.elapsed_ms} ms)")
+        elif st.session_state.get("check_result"):
+            # Keep the last result (and its table edits / page) across reruns
+            _render_check(st.session_state["check_result"])
 
 # ---------------------------
-# History Page (placeholder)
+# History Page
 # ---------------------------
 elif menu == "History":
     st.title("📂 Your Past Scans")
-    st.info("History of scanned products will appear here (coming soon).")
+    RISK_BADGES = {"high": "🔴 High", "medium": "🟠 Medium", "low": "🟢 Low"}
+    scans = user_scans(st.session_state["username"]) if st.session_state.get("username") else []
+    if scans:
+        st.dataframe(
+            [{"When": datetime.fromtimestamp(s["ts"]).strftime("%Y-%m-%d %H:%M"),
+              "Product": s["product_label"],
+              "Source": s["source"].title(),
+              "Matched": f"{s['n_matched']} of {s['n_tokens']}",
+              "Risk": RISK_BADGES.get(s["risk"], s["risk"])} for s in scans],
+            hide_index=True,
+        )
+    else:
+        st.info("No scans yet — check an ingredient list on the Home page.")
+
+    # Cross-user dashboard: reads only the summary tables built by `python -m src.analytics`
+    if st.session_state.get("role") == "admin":
+        import pandas as pd
+
+        st.markdown("---")
+        st.subheader("📊 All Users (last 30 days)")
+        pending = analytics.pending_scans()
+        if pending:
+            st.caption(f"{pending} newer scans are not aggregated yet — run `python -m src.analytics`.")
+        risk = analytics.risk_distribution(30)
+        if risk:
+            st.bar_chart(pd.DataFrame(risk).set_index("risk"))
+            trends = analytics.category_trends(30)
+            if trends:
+                st.line_chart(pd.DataFrame(trends).pivot(index="day", columns="category", values="items"))
+            c1, c2 = st.columns(2)
+            with c1:
+                st.markdown("**Most scanned flagged ingredients**")
+                st.dataframe(analytics.top_ingredients(15, harmful_only=True), hide_index=True)
+            with c2:
+                st.markdown("**Most scanned products**")
+                st.dataframe(analytics.top_products(15), hide_index=True)
+        else:
+            st.caption("No aggregates yet.")
+
+if profile_note is not None and st.session_state.get("profile_next_scan"):
+    profile_note.caption("Next Read Text / Check Ingredients will be profiled.")
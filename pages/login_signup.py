@@ -7,6 +7,8 @@ import random
 from email.message import EmailMessage
 import streamlit.components.v1 as components
 
+from src.preload import start_preload
+
 components.html("""
     <script>
         history.pushState(null, '', location.href);
@@ -223,6 +225,9 @@ def send_reset_otp(receiver_email):
 # ---- Init DB ----
 init_db()
 
+# ---- Warm OCR / matcher while the user logs in (no-op if already started) ----
+start_preload()
+
 # ---- HEADER ----
 st.markdown("<div class='title'>Welcome to Viveka</div>", unsafe_allow_html=True)
 st.markdown("<div class='subtitle'>We pray for your Good health</div>", unsafe_allow_html=True)
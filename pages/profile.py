@@ -1,12 +1,12 @@
 # pages/profile.py
 import streamlit as st
-import sqlite3
 from pathlib import Path
 from PIL import Image
 import os
 
+from src.profile_store import get_profile, save_profile
+
 # -------- CONFIG ----------
-DB_FILE = "users.db"
 PROFILE_PIC_DIR = Path("profile_pics")
 PROFILE_PIC_DIR.mkdir(exist_ok=True)
 
@@ -96,51 +96,14 @@ cursor:pointer; color:#bbb; margin-bottom:10px; }
 </style>
 """, unsafe_allow_html=True)
 
-# -------- DATABASE FUNCTIONS ----------
-def init_profile_db():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS profiles (
-        username TEXT PRIMARY KEY,
-        fullname TEXT,
-        age INTEGER,
-        gender TEXT,
-        blood_group TEXT,
-        allergies TEXT,
-        conditions TEXT,
-        medications TEXT,
-        profile_pic TEXT
-    )''')
-    conn.commit()
-    conn.close()
-
-def get_profile(username):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("SELECT * FROM profiles WHERE username=?", (username,))
-    row = c.fetchone()
-    conn.close()
-    return row
-
-def save_profile(username, fullname, age, gender, blood_group, allergies, conditions, medications, profile_pic):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''INSERT OR REPLACE INTO profiles
-        (username, fullname, age, gender, blood_group, allergies, conditions, medications, profile_pic)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-        (username, fullname, age, gender, blood_group, allergies, conditions, medications, profile_pic))
-    conn.commit()
-    conn.close()
-
 # -------- PERSONALIZED ALERTS ----------
 def personalized_alerts(profile):
-    _, fullname, age, gender, blood_group, allergies, conditions, medications, _ = profile
     alerts = []
-    if not fullname: alerts.append("Full name is missing!")
-    if not blood_group: alerts.append("Blood group not provided!")
-    if not age or age <= 0: alerts.append("Age seems invalid!")
-    if allergies: alerts.append(f"⚠️ Allergies recorded: {allergies}")
-    if conditions: alerts.append(f"⚠️ Medical conditions recorded: {conditions}")
+    if not profile.fullname: alerts.append("Full name is missing!")
+    if not profile.blood_group: alerts.append("Blood group not provided!")
+    if not profile.age or profile.age <= 0: alerts.append("Age seems invalid!")
+    if profile.allergies: alerts.append(f"⚠️ Allergies recorded: {profile.allergies}")
+    if profile.conditions: alerts.append(f"⚠️ Medical conditions recorded: {profile.conditions}")
     return alerts
 
 # -------- IMAGE HANDLER ----------
@@ -157,13 +120,18 @@ if "logged_in" not in st.session_state or not st.session_state["logged_in"]:
     st.warning("⚠️ Please login to view your profile.")
 else:
     username = st.session_state["username"]
-    init_profile_db()
     profile = get_profile(username)
 
     # PROFILE EXISTS
     if profile:
-        (u, fullname, age, gender, blood_group,
-         allergies, conditions, medications, profile_pic) = profile
+        fullname = profile.fullname
+        age = profile.age
+        gender = profile.gender
+        blood_group = profile.blood_group
+        allergies = profile.allergies
+        conditions = profile.conditions
+        medications = profile.medications
+        profile_pic = profile.profile_pic
 
         st.markdown('<div class="profile-container">', unsafe_allow_html=True)
 
@@ -0,0 +1,80 @@
+# importtime_report.py — Measure module import cost with `python -X importtime`
+#
+# Usage:
+#   python scripts/importtime_report.py                      # default app modules
+#   python scripts/importtime_report.py src.matcher --top 15 --json
+#
+# Each module is imported in a fresh interpreter (from the project root) so
+# results reflect a cold worker. Reports the module's own cumulative import
+# time, the process wall time, and the heaviest imports pulled in.
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ["src.matcher", "src.analyzer", "src.ocr_utils", "src.tokenizer", "src.api"]
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module, top=10):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        m = LINE.match(line)
+        if m:
+            entries.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3))))
+    cumulative = {name: cum for name, _, cum, _ in entries}
+    # importtime prints children before their parent, indented deeper: walk back
+    # from the module's own line to collect everything imported on its behalf.
+    pulled_in = []
+    idx = next((i for i, e in enumerate(entries) if e[0] == module), None)
+    if idx is not None:
+        depth = entries[idx][3]
+        for name, _, cum, d in reversed(entries[:idx]):
+            if d <= depth:
+                break
+            if not module.startswith(name + "."):
+                pulled_in.append((name, cum))
+    return {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "error": None if proc.returncode == 0 else proc.stderr.strip().splitlines()[-1],
+        "wall_ms": round(wall_ms, 1),
+        "import_ms": round(cumulative.get(module, 0) / 1000, 1),
+        "heaviest": [
+            {"module": name, "ms": round(cum / 1000, 1)}
+            for name, cum in sorted(pulled_in, key=lambda x: -x[1])[:top]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report cold import cost per module.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=8, help="Heaviest top-level imports to list")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    reports = [measure(m, args.top) for m in args.modules]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    for r in reports:
+        status = f"{r['import_ms']:>8.1f} ms import, {r['wall_ms']:>8.1f} ms process" if r["ok"] else f"FAILED: {r['error']}"
+        print(f"{r['module']:<16} {status}")
+        for h in r["heaviest"]:
+            print(f"    {h['ms']:>8.1f} ms  {h['module']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# loadtest_api.py — Local load-test harness for the scan API (src/api.py)
+#
+# Usage:
+#   uvicorn src.api:app --port 8000 &
+#   python scripts/loadtest_api.py --url http://127.0.0.1:8000 --endpoint match \
+#          --concurrency 32 --duration 30
+#
+# Each simulated client sends requests back-to-back over a keep-alive connection
+# for `--duration` seconds; the report gives RPS and p50/p90/p99 latency.
+import argparse
+import http.client
+import json
+import mimetypes
+import os
+import random
+import statistics
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+SAMPLE_TOKENS = [
+    "Sugar", "Salt", "Sodium Benzoate", "Aspartame", "Monosodium Glutamate", "Palm Oil",
+    "Citric Acid", "Water", "Wheat Flour", "Milk Solids", "Soy Lecithin", "Paracetamol",
+    "Caffeine", "Sucralose", "Tartrazine", "Potassium Sorbate", "Corn Syrup", "Cocoa",
+]
+
+
+# -------------------------------
+# Request Builders
+# -------------------------------
+def _json_body(endpoint, tokens_per_request):
+    tokens = random.sample(SAMPLE_TOKENS, min(tokens_per_request, len(SAMPLE_TOKENS)))
+    if endpoint == "analyze":
+        return json.dumps({"text": ", ".join(tokens)}).encode(), "application/json"
+    return json.dumps({"tokens": tokens}).encode(), "application/json"
+
+
+def _multipart_body(image_path):
+    boundary = uuid.uuid4().hex
+    with open(image_path, "rb") as f:
+        data = f.read()
+    ctype = mimetypes.guess_type(image_path)[0] or "application/octet-stream"
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{os.path.basename(image_path)}"\r\n'
+        f"Content-Type: {ctype}\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+# -------------------------------
+# Client Loop
+# -------------------------------
+def _client(url, endpoint, args, deadline, latencies, errors, lock):
+    conn_cls = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+    conn = conn_cls(url.hostname, url.port, timeout=60)
+    while time.perf_counter() < deadline:
+        if endpoint == "ocr":
+            body, ctype = _multipart_body(args.image)
+        else:
+            body, ctype = _json_body(endpoint, args.tokens)
+        start = time.perf_counter()
+        try:
+            conn.request("POST", f"/{endpoint}", body=body, headers={"Content-Type": ctype})
+            resp = conn.getresponse()
+            resp.read()
+            ok = resp.status == 200
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conn.close()
+            conn = conn_cls(url.hostname, url.port, timeout=60)
+        elapsed = time.perf_counter() - start
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors.append(elapsed)
+    conn.close()
+
+
+def _percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(pct / 100 * len(values))) - 1))
+    return values[k]
+
+
+def run(args):
+    url = urlparse(args.url)
+    latencies, errors, lock = [], [], threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=_client, args=(url, args.endpoint, args, deadline, latencies, errors, lock))
+        for _ in range(args.concurrency)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    report = {
+        "endpoint": args.endpoint,
+        "concurrency": args.concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": round(len(latencies) / wall, 2),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p90_ms": round(_percentile(latencies, 90) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Viveka scan API.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", choices=["ocr", "match", "analyze"], default="match")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15, help="Seconds to run")
+    parser.add_argument("--tokens", type=int, default=8, help="Tokens per match/analyze request")
+    parser.add_argument("--image", help="Label image to upload (required for --endpoint ocr)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+    if args.endpoint == "ocr" and not args.image:
+        parser.error("--image is required for the ocr endpoint")
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report))
+    else:
+        for k, v in report.items():
+            print(f"{k:>12}: {v}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+# loadtest_app.py — Simulated concurrent users of the Streamlit app (main.py + pages/)
+#
+# Usage:
+#   python scripts/loadtest_app.py --users 8 --duration 60
+#   python scripts/loadtest_app.py --workers 2 --users 8 --images benchmarks/fixtures/
+#
+# Every simulated user is one Streamlit AppTest session driving the real pages:
+# sign up on pages/login_signup.py (the verification email goes to a local stub
+# SMTP and the code is read back from it), log in, then repeatedly upload a
+# label photo + "Read Text" (with --images) and "Check Ingredients" until
+# --duration runs out. Users of one worker are threads in one process, sharing
+# its caches, matcher and SQLite files the way sessions of one `streamlit run`
+# server do; --workers starts that many such processes.
+#
+# The report gives checks per second, p50/p90/p99 latency per step and the
+# peak RSS of each worker. Without easyocr, or with no --images, users type
+# ingredient lists instead of uploading photos.
+#
+# The run happens in a throwaway working directory (users.db, cache/, logs/),
+# so real accounts and caches are untouched; pass --workdir to keep it.
+import argparse
+import importlib.util
+import json
+import mimetypes
+import multiprocessing
+import os
+import random
+import re
+import resource
+import shutil
+import smtplib
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGE_TYPES = (".jpg", ".jpeg", ".png")
+
+SAMPLE_TOKENS = [
+    "Sugar", "Salt", "Sodium Benzoate", "Aspartame", "Monosodium Glutamate", "Palm Oil",
+    "Citric Acid", "Water", "Wheat Flour", "Milk Solids", "Soy Lecithin", "Paracetamol",
+    "Caffeine", "Sucralose", "Tartrazine", "Potassium Sorbate", "Corn Syrup", "Cocoa",
+]
+
+
+# -------------------------------
+# Local SMTP Stub
+# -------------------------------
+class _StubSMTP:
+    """Stands in for smtplib.SMTP_SSL: messages land in `mailbox` instead of Gmail."""
+    mailbox = {}
+    lock = threading.Lock()
+
+    def __init__(self, host="", port=0, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def login(self, user, password):
+        return 235, b"Authentication successful"
+
+    def send_message(self, msg, *args, **kwargs):
+        with self.lock:
+            self.mailbox[msg["To"]] = msg.get_body(("plain",)).get_content()
+        return {}
+
+    def quit(self):
+        pass
+
+
+def _read_code(email):
+    with _StubSMTP.lock:
+        body = _StubSMTP.mailbox.pop(email, "")
+    found = re.search(r"\b(\d{6})\b", body)
+    return found.group(1) if found else None
+
+
+# -------------------------------
+# Simulated User
+# -------------------------------
+def _widget(at, kind, label):
+    for w in getattr(at, kind):
+        if w.label == label:
+            return w
+    shown = "; ".join(e.value for e in at.error)
+    raise LookupError(f"No {kind} labelled {label!r}" + (f" (page shows: {shown})" if shown else ""))
+
+
+def _timed(latencies, step, action):
+    start = time.perf_counter()
+    at = action()
+    latencies.setdefault(step, []).append(time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError(f"{step}: {at.exception[0].value}")
+    return at
+
+
+def _images(paths):
+    files = []
+    for path in paths or []:
+        if os.path.isdir(path):
+            files += [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.lower().endswith(IMAGE_TYPES)]
+        elif path.lower().endswith(IMAGE_TYPES):
+            files.append(path)
+    loaded = []
+    for path in files:
+        with open(path, "rb") as f:
+            loaded.append((os.path.basename(path), f.read(), mimetypes.guess_type(path)[0] or "image/jpeg"))
+    return loaded
+
+
+def _user(n, args, images, deadline, latencies, errors):
+    from streamlit.testing.v1 import AppTest
+
+    name = f"load_{uuid.uuid4().hex[:8]}_{n}"
+    email, password = f"{name}@example.com", "loadtest-pass"
+    rng = random.Random(n)
+    try:
+        at = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=args.timeout)
+        at.run()
+        at.switch_page("pages/login_signup.py").run()
+
+        # ---- Sign up (verification code comes back through the SMTP stub) ----
+        _widget(at, "text_input", "Email").input(email)
+        _widget(at, "text_input", "Create Username").input(name)
+        _widget(at, "text_input", "Create Password").input(password)
+        _widget(at, "text_input", "Confirm Password").input(password)
+        _timed(latencies, "signup", lambda: _widget(at, "button", "📤 Send Verification Code").click().run())
+        _widget(at, "text_input", "Enter Verification Code").input(_read_code(email))
+        _timed(latencies, "signup", lambda: _widget(at, "button", "✅ Complete Sign Up").click().run())
+
+        # ---- Log in (the page switches to pages/app.py itself) ----
+        at.text_input(key="login_user").input(name)
+        at.text_input(key="login_pass").input(password)
+        _timed(latencies, "login", lambda: _widget(at, "button", "Login").click().run())
+        if not at.session_state["logged_in"]:
+            raise RuntimeError("login failed")
+        # The login run already rendered pages/app.py; later reruns must target it too
+        # (AppTest otherwise re-runs the last page passed to at.switch_page)
+        at.switch_page("pages/app.py")
+
+        while time.perf_counter() < deadline:
+            tokens = None
+            if images:
+                at.file_uploader[0].set_value(rng.choice(images))
+                _timed(latencies, "upload", at.run)
+                _timed(latencies, "read_text", lambda: at.button(key="read_btn").click().run())
+                tokens = at.session_state["ingredient_list"] or None
+            if tokens is None:
+                text = "\n".join(rng.sample(SAMPLE_TOKENS, min(args.tokens, len(SAMPLE_TOKENS))))
+                _timed(latencies, "edit", lambda: at.text_area(key="manual_input_area").input(text).run())
+            _timed(latencies, "check", lambda: at.button(key="analyze_btn").click().run())
+            if args.think:
+                time.sleep(rng.uniform(0, 2 * args.think))
+    except Exception as e:
+        errors.append(f"{name}: {e}")
+
+
+# -------------------------------
+# Worker Process
+# -------------------------------
+def _rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def _share_runtime():
+    """
+    Make AppTest sessions safe to run side by side in one process.
+    AppTest installs a mock Runtime for each run and clears it afterwards, which
+    breaks the other sessions running at the same time. Fall back to the last
+    one installed — a server process has one Runtime for all sessions anyway.
+    """
+    from streamlit import config, logger
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.pages_manager import PagesManager
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    last = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            last[:] = [cls._instance]
+            return cls._instance
+        if last:
+            return last[0]
+        raise RuntimeError("Runtime hasn't been created!")
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(last))
+    # Likewise one bytecode cache: pages compile once (under its lock) instead of on every
+    # run, which is what a server does — and concurrent ast.parse calls are not thread-safe
+    script_cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    # Each run also resets the class-wide "has a pages/ directory" flag, so a run that
+    # starts meanwhile falls back to main.py; aim the reset at a subclass instead
+    PagesManager.uses_pages_directory = os.path.isdir(os.path.join(ROOT, "pages"))
+    app_test.PagesManager = type("PagesManager", (PagesManager,), {})
+    # Each run patches and restores this option; set it for good so overlapping runs agree
+    config.set_option("global.appTest", True)
+    logger.set_log_level("error")  # per-thread "missing ScriptRunContext" noise
+
+
+def _worker(index, args, start_at):
+    os.chdir(args.workdir)  # users.db, cache/ and logs/ are relative to the working directory
+    sys.path.insert(0, ROOT)
+    smtplib.SMTP_SSL = _StubSMTP
+    _share_runtime()
+    images = _images(args.images) if args.ocr else []
+    rss_start = _rss_mb()
+
+    latencies, errors = {}, []
+    time.sleep(max(0.0, start_at - time.time()))  # all workers start together
+    deadline = time.perf_counter() + args.duration
+    threads = []
+    for n in range(args.users):
+        t = threading.Thread(target=_user, args=(index * args.users + n, args, images, deadline, latencies, errors))
+        t.start()
+        threads.append(t)
+        time.sleep(args.ramp / max(1, args.users))
+    for t in threads:
+        t.join()
+    return {
+        "worker": index,
+        "pid": os.getpid(),
+        "latencies": latencies,
+        "errors": errors,
+        "rss_start_mb": round(rss_start, 1),
+        "rss_end_mb": round(_rss_mb(), 1),
+        "rss_peak_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def _percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(pct / 100 * len(values))) - 1))
+    return values[k]
+
+
+def run(args):
+    start_at = time.time() + 1
+    if args.workers == 1:
+        results = [_worker(0, args, start_at)]
+    else:
+        with multiprocessing.get_context("spawn").Pool(args.workers) as pool:
+            results = pool.starmap(_worker, [(i, args, start_at) for i in range(args.workers)])
+    wall = time.time() - start_at
+
+    steps = {}
+    for r in results:
+        for step, values in r["latencies"].items():
+            steps.setdefault(step, []).extend(values)
+    checks = len(steps.get("check", []))
+    return {
+        "workers": args.workers,
+        "users": args.workers * args.users,
+        "mode": "ocr" if args.ocr else "typed",
+        "checks": checks,
+        "checks_per_s": round(checks / wall, 2),
+        "errors": sum(len(r["errors"]) for r in results),
+        "steps": {
+            step: {
+                "count": len(values),
+                "p50_ms": round(_percentile(values, 50) * 1000, 1),
+                "p90_ms": round(_percentile(values, 90) * 1000, 1),
+                "p99_ms": round(_percentile(values, 99) * 1000, 1),
+                "mean_ms": round(statistics.fmean(values) * 1000, 1),
+            }
+            for step, values in steps.items()
+        },
+        "memory": [
+            {k: r[k] for k in ("worker", "pid", "rss_start_mb", "rss_end_mb", "rss_peak_mb")} for r in results
+        ],
+        "error_samples": [e for r in results for e in r["errors"]][:5],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Viveka Streamlit app with simulated users.")
+    parser.add_argument("--workers", type=int, default=1, help="Server processes to simulate")
+    parser.add_argument("--users", type=int, default=4, help="Concurrent users per worker")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds each worker runs")
+    parser.add_argument("--ramp", type=float, default=0, help="Seconds over which users join")
+    parser.add_argument("--think", type=float, default=0, help="Mean pause between checks (seconds)")
+    parser.add_argument("--tokens", type=int, default=8, help="Ingredients per typed list")
+    parser.add_argument("--images", nargs="*", help="Label photos (files or directories) to upload")
+    parser.add_argument("--timeout", type=float, default=120, help="Per-interaction timeout (seconds)")
+    parser.add_argument("--workdir", help="Working directory for users.db/cache (default: temporary)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    args.ocr = bool(args.images)
+    if args.ocr and importlib.util.find_spec("easyocr") is None:
+        print("easyocr is not installed; users will type ingredient lists instead of uploading photos")
+        args.ocr = False
+    if args.ocr and not _images(args.images):
+        parser.error("--images: no .jpg/.jpeg/.png files found")
+
+    keep = bool(args.workdir)
+    args.workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="viveka-loadtest-"))
+    os.makedirs(args.workdir, exist_ok=True)
+    if not os.path.exists(os.path.join(args.workdir, "assets")):
+        os.symlink(os.path.join(ROOT, "assets"), os.path.join(args.workdir, "assets"))
+    try:
+        report = run(args)
+    finally:
+        if not keep:
+            shutil.rmtree(args.workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(report))
+        return
+    for k, v in report.items():
+        if k == "steps":
+            for step, s in v.items():
+                print(f"{step:>12}: n={s['count']} p50={s['p50_ms']}ms p90={s['p90_ms']}ms "
+                      f"p99={s['p99_ms']}ms mean={s['mean_ms']}ms")
+        elif k == "memory":
+            for m in v:
+                print(f"{'worker ' + str(m['worker']):>12}: rss start={m['rss_start_mb']}MB "
+                      f"end={m['rss_end_mb']}MB peak={m['rss_peak_mb']}MB")
+        elif k != "error_samples" or v:
+            print(f"{k:>12}: {v}")
+
+
+if __name__ == "__main__":
+    main()
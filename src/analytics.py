@@ -0,0 +1,224 @@
+# analytics.py — Offline aggregation of scan history into summary tables
+#
+# Usage:
+#   python -m src.analytics                   # fold new scans into the summaries once
+#   python -m src.analytics --loop 300        # keep doing it every 5 minutes
+#   python -m src.analytics --report          # print the dashboard aggregates
+#
+# Raw scans (src/history.py) are only ever appended, so each run folds in the
+# scans with an id above the stored watermark, BATCH_SIZE at a time. Each batch
+# is one transaction that upserts the summary tables and advances the
+# watermark, so an interrupted run neither loses nor double-counts scans.
+# Dashboards read the small agg_* tables through the functions at the bottom
+# instead of scanning the history.
+import argparse
+import json
+import sqlite3
+import time
+
+from src.history import _connect, init_history_db
+
+BATCH_SIZE = 5000
+
+_SUMMARY_TABLES = (
+    '''CREATE TABLE IF NOT EXISTS analytics_state (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )''',
+    # Ingredient frequency (how many scans contained it)
+    '''CREATE TABLE IF NOT EXISTS agg_ingredient (
+        ingredient TEXT PRIMARY KEY,
+        category TEXT,
+        side_effects TEXT,
+        prescription TEXT,
+        scans INTEGER NOT NULL,
+        last_seen REAL
+    )''',
+    # Most scanned products
+    '''CREATE TABLE IF NOT EXISTS agg_product (
+        product_id TEXT PRIMARY KEY,
+        product_label TEXT,
+        barcode TEXT,
+        scans INTEGER NOT NULL,
+        last_seen REAL
+    )''',
+    # Risk distribution per day
+    '''CREATE TABLE IF NOT EXISTS agg_risk_daily (
+        day TEXT NOT NULL,
+        risk TEXT NOT NULL,
+        scans INTEGER NOT NULL,
+        PRIMARY KEY (day, risk)
+    )''',
+    # Per-category trend: matched ingredients of each category per day
+    '''CREATE TABLE IF NOT EXISTS agg_category_daily (
+        day TEXT NOT NULL,
+        category TEXT NOT NULL,
+        items INTEGER NOT NULL,
+        PRIMARY KEY (day, category)
+    )''',
+)
+
+# Each statement folds scans with watermark < id <= batch end (?1, ?2) into a summary.
+# ("WHERE" before ON CONFLICT keeps SQLite's upsert parser unambiguous.)
+_FOLD = (
+    '''INSERT INTO agg_ingredient (ingredient, category, side_effects, prescription, scans, last_seen)
+       SELECT i.ingredient, MAX(i.category), MAX(i.side_effects), MAX(i.prescription),
+              COUNT(DISTINCT i.scan_id), MAX(s.ts)
+       FROM scan_items i JOIN scans s ON s.id = i.scan_id
+       WHERE i.scan_id > ?1 AND i.scan_id <= ?2 AND i.ingredient IS NOT NULL
+       GROUP BY i.ingredient
+       ON CONFLICT (ingredient) DO UPDATE SET
+           scans = scans + excluded.scans,
+           category = excluded.category,
+           side_effects = excluded.side_effects,
+           prescription = excluded.prescription,
+           last_seen = MAX(last_seen, excluded.last_seen)''',
+    '''INSERT INTO agg_product (product_id, product_label, barcode, scans, last_seen)
+       SELECT product_id, MAX(product_label), MAX(barcode), COUNT(*), MAX(ts)
+       FROM scans WHERE id > ?1 AND id <= ?2 AND product_id IS NOT NULL
+       GROUP BY product_id
+       ON CONFLICT (product_id) DO UPDATE SET
+           scans = scans + excluded.scans,
+           product_label = COALESCE(excluded.product_label, product_label),
+           barcode = COALESCE(excluded.barcode, barcode),
+           last_seen = MAX(last_seen, excluded.last_seen)''',
+    '''INSERT INTO agg_risk_daily (day, risk, scans)
+       SELECT date(ts, 'unixepoch'), COALESCE(risk, 'unknown'), COUNT(*)
+       FROM scans WHERE id > ?1 AND id <= ?2
+       GROUP BY 1, 2
+       ON CONFLICT (day, risk) DO UPDATE SET scans = scans + excluded.scans''',
+    '''INSERT INTO agg_category_daily (day, category, items)
+       SELECT date(s.ts, 'unixepoch'), COALESCE(i.category, 'Unknown'), COUNT(*)
+       FROM scan_items i JOIN scans s ON s.id = i.scan_id
+       WHERE i.scan_id > ?1 AND i.scan_id <= ?2
+       GROUP BY 1, 2
+       ON CONFLICT (day, category) DO UPDATE SET items = items + excluded.items''',
+)
+
+
+_db_ready = False
+
+
+def init_analytics_db():
+    """
+    Create the history and summary tables (once per process).
+    """
+    global _db_ready
+    if _db_ready:
+        return
+    init_history_db()
+    conn = _connect()
+    for ddl in _SUMMARY_TABLES:
+        conn.execute(ddl)
+    conn.commit()
+    conn.close()
+    _db_ready = True
+
+
+def _watermark(conn):
+    row = conn.execute("SELECT value FROM analytics_state WHERE name = 'last_scan_id'").fetchone()
+    return row[0] if row else 0
+
+
+def refresh(batch_size=BATCH_SIZE):
+    """
+    Fold every scan recorded since the last run into the summary tables.
+    :param batch_size: Scans per transaction
+    :return: Number of scans folded in
+    """
+    init_analytics_db()
+    conn = _connect()
+    try:
+        done = 0
+        while True:
+            low = _watermark(conn)
+            high = conn.execute(
+                "SELECT MAX(id) FROM (SELECT id FROM scans WHERE id > ? ORDER BY id LIMIT ?)",
+                (low, batch_size),
+            ).fetchone()[0]
+            if high is None:
+                return done
+            with conn:  # summaries and watermark commit together
+                for sql in _FOLD:
+                    conn.execute(sql, (low, high))
+                conn.execute(
+                    "INSERT INTO analytics_state (name, value) VALUES ('last_scan_id', ?) "
+                    "ON CONFLICT (name) DO UPDATE SET value = excluded.value",
+                    (high,),
+                )
+            done += conn.execute("SELECT COUNT(*) FROM scans WHERE id > ? AND id <= ?", (low, high)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+# -------------------------------
+# Dashboard Queries (summary tables only)
+# -------------------------------
+def _query(sql, params=()):
+    init_analytics_db()
+    conn = _connect()
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(r) for r in conn.execute(sql, params).fetchall()]
+    finally:
+        conn.close()
+
+
+def top_ingredients(limit=20, harmful_only=False):
+    """Most frequently scanned ingredients; `harmful_only` keeps prescription / side-effect ones."""
+    where = ("WHERE prescription = 'Yes' OR COALESCE(side_effects, '') NOT IN "
+             "('Minimal', 'Generally safe', 'None', '')") if harmful_only else ""
+    return _query(f'''SELECT ingredient, category, side_effects, prescription, scans
+                      FROM agg_ingredient {where} ORDER BY scans DESC LIMIT ?''', (limit,))
+
+
+def top_products(limit=20):
+    return _query('''SELECT product_label, barcode, scans FROM agg_product
+                     ORDER BY scans DESC LIMIT ?''', (limit,))
+
+
+def risk_distribution(days=30):
+    return _query('''SELECT risk, SUM(scans) AS scans FROM agg_risk_daily
+                     WHERE day >= date('now', ?) GROUP BY risk ORDER BY scans DESC''', (f"-{days} days",))
+
+
+def pending_scans():
+    """Scans recorded since the last refresh (not yet in the summaries)."""
+    init_analytics_db()
+    conn = _connect()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM scans WHERE id > ?", (_watermark(conn),)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def category_trends(days=30):
+    return _query('''SELECT day, category, items FROM agg_category_daily
+                     WHERE day >= date('now', ?) ORDER BY day, category''', (f"-{days} days",))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate scan history into summary tables.")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="Scans per transaction")
+    parser.add_argument("--loop", type=float, default=0, help="Repeat every N seconds")
+    parser.add_argument("--report", action="store_true", help="Print dashboard aggregates")
+    args = parser.parse_args(argv)
+
+    while True:
+        start = time.perf_counter()
+        n = refresh(args.batch)
+        print(f"Folded {n} new scans in {time.perf_counter() - start:.2f}s")
+        if not args.loop:
+            break
+        time.sleep(args.loop)
+
+    if args.report:
+        print(json.dumps({
+            "top_harmful_ingredients": top_ingredients(10, harmful_only=True),
+            "top_products": top_products(10),
+            "risk_distribution_30d": risk_distribution(30),
+        }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
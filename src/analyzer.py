@@ -1,67 +1,186 @@
-import streamlit as st
-import pandas as pd
+import re
+
+from src.metrics import timed
+
+# pandas and streamlit are imported inside the functions that need them, so the
+# batch scanner and API can import this module without loading Streamlit.
+
+
+ANALYSIS_COLUMNS = ["Ingredient", "Category", "Side Effects", "Prescription Required"]
+
+# You can expand this mapping for layman terms
+SIDE_EFFECTS_MAPPING = {
+    "Minimal": "Generally safe",
+    "Stomach upset": "May cause stomach issues",
+    "Allergic reactions": "Can cause allergy",
+    "Obesity": "May contribute to weight gain",
+    "High sodium": "High salt content",
+    "High cholesterol": "May raise cholesterol"
+}
 
 
 # -------------------------------
 # Analyzer Function
 # -------------------------------
+def analyze_item(item):
+    """
+    Convert one matched ingredient record into a user-friendly analysis row.
+    :param item: Ingredient dict from matcher
+    :return: Dict with ANALYSIS_COLUMNS keys
+    """
+    # Convert technical terms to common terms (example mapping)
+    side_effects = item.get("Possible Side Effects", "None")
+    category = item.get("Category", "Unknown")
+    prescription = item.get("Prescription Required", "No")
+    side_effects_friendly = SIDE_EFFECTS_MAPPING.get(side_effects, side_effects)
+
+    return {
+        "Ingredient": item.get("Ingredient", ""),
+        "Category": category,
+        "Side Effects": side_effects_friendly,
+        "Prescription Required": prescription
+    }
+
+
+@timed("analyze.dataframe")
+def analysis_frame(rows):
+    """
+    Build the analysis DataFrame from rows made by analyze_item.
+    :param rows: List of analysis row dicts
+    :return: DataFrame ready for Streamlit display
+    """
+    import pandas as pd
+
+    return pd.DataFrame(rows, columns=ANALYSIS_COLUMNS)
+
+
+@timed("analyze.dataframe")
+def analyze_rows(matched):
+    """
+    Column-wise analyze_item for a MatchedRows: each analysis column is one
+    gather from the shared DB column, with no per-row dicts.
+    :param matched: MatchedRows from the matcher
+    :return: DataFrame ready for Streamlit display
+    """
+    import pandas as pd
+
+    n = len(matched)
+
+    def column(name, default):
+        values = matched.column(name) if n else None
+        return values if values is not None else [default] * n
+
+    # A dict lookup per row is much cheaper than Series.replace at label sizes
+    side_effects = [SIDE_EFFECTS_MAPPING.get(v, v) for v in column("Possible Side Effects", "None")]
+    return pd.DataFrame({
+        "Ingredient": column("Ingredient", ""),
+        "Category": column("Category", "Unknown"),
+        "Side Effects": side_effects,
+        "Prescription Required": column("Prescription Required", "No"),
+    }, columns=ANALYSIS_COLUMNS)
+
+
 def analyze_ingredients(matched_items):
     """
     Prepare ingredient info for display in user-friendly format.
-    :param matched_items: List of dicts from matcher
+    :param matched_items: MatchedRows from match_ingredients, or a list of dicts
     :return: DataFrame ready for Streamlit display
     """
-    if not matched_items:
-        return pd.DataFrame(columns=["Ingredient", "Category", "Side Effects", "Prescription Required"])
-
-    data = []
-    for item in matched_items:
-        # Convert technical terms to common terms (example mapping)
-        side_effects = item.get("Possible Side Effects", "None")
-        category = item.get("Category", "Unknown")
-        prescription = item.get("Prescription Required", "No")
-
-        # You can expand this mapping for layman terms
-        side_effects_mapping = {
-            "Minimal": "Generally safe",
-            "Stomach upset": "May cause stomach issues",
-            "Allergic reactions": "Can cause allergy",
-            "Obesity": "May contribute to weight gain",
-            "High sodium": "High salt content",
-            "High cholesterol": "May raise cholesterol"
-        }
-        side_effects_friendly = side_effects_mapping.get(side_effects, side_effects)
-
-        data.append({
-            "Ingredient": item.get("Ingredient", ""),
-            "Category": category,
-            "Side Effects": side_effects_friendly,
-            "Prescription Required": prescription
-        })
-
-    df = pd.DataFrame(data)
-    return df
+    from src.matcher import MatchedRows
+
+    if isinstance(matched_items, MatchedRows):
+        return analyze_rows(matched_items)
+    return analysis_frame([analyze_item(item) for item in matched_items or []])
 
 
 # -------------------------------
-# Streamlit Display Function
+# Streamlit Display Functions
 # -------------------------------
-def display_analysis(df):
+# Tables longer than this are paginated; only the visible page is sent to the browser
+PAGE_SIZE = 50
+# Token lists longer than this scroll inside a fixed-height box
+TOKEN_LIST_SCROLL_AFTER = 15
+
+_MARKDOWN_SPECIAL = re.compile(r"([\\`*_{}\[\]()#+\-.!|<>~])")
+
+
+def _escape_markdown(text):
+    return _MARKDOWN_SPECIAL.sub(r"\\\1", str(text))
+
+
+def display_token_list(tokens):
+    """
+    Show tokens as one numbered markdown list (a single element, however long).
+    :param tokens: List of ingredient strings
+    """
+    import streamlit as st
+
+    text = "\n".join(f"{i}. {_escape_markdown(t)}" for i, t in enumerate(tokens, 1))
+    if len(tokens) > TOKEN_LIST_SCROLL_AFTER:
+        st.container(height=360).markdown(text)
+    else:
+        st.markdown(text)
+
+
+def _frame_signature(df):
+    import pandas as pd
+
+    return str(int(pd.util.hash_pandas_object(df, index=True).sum()))
+
+
+def display_analysis(df, key="analysis", page_size=PAGE_SIZE):
     """
     Display ingredient analysis in Streamlit with manual edit option.
+    Large tables are paginated: only the current page goes to st.data_editor,
+    and each page's edits are kept and merged back into the full table.
     :param df: DataFrame from analyze_ingredients
+    :param key: Widget key prefix (one per table on the page)
+    :param page_size: Rows per page
+    :return: Full DataFrame including the user's edits on every page
     """
+    import streamlit as st
+    import pandas as pd
+
     st.subheader("Matched Ingredients Analysis")
 
     if df.empty:
         st.info("No ingredients matched.")
         return df
 
-    # Editable table
-    edited_df = st.data_editor(df, num_rows="dynamic")
+    # Edits belong to this exact table; a new analysis starts fresh
+    sig = _frame_signature(df)
+    if len(df) <= page_size:
+        # Editable table
+        return st.data_editor(df, num_rows="dynamic", key=f"{key}_{sig}")
+
+    n_pages = (len(df) + page_size - 1) // page_size
+    nav, info = st.columns([1, 3])
+    page = int(nav.number_input("Page", min_value=1, max_value=n_pages, step=1, key=f"{key}_{sig}_page"))
+    start = (page - 1) * page_size
+    end = min(start + page_size, len(df))
+    info.caption(f"Rows {start + 1}–{end} of {len(df)}")
+
+    # Each page's edits live in plain session state as (generation, start frame,
+    # edited frame). Within a generation the editor always gets the same start
+    # frame: its data is part of the widget id, so passing the edited frame back
+    # would drop the next edit. Streamlit discards an editor's widget state once
+    # it isn't rendered, so when the user comes back to a page its editor
+    # restarts (next generation key) from the last edited frame.
+    state_key = f"{key}_page_edits"
+    stored_sig, edits = st.session_state.get(state_key, (None, {}))
+    if stored_sig != sig:
+        edits = {}
+    original = df.iloc[start:end]
+    gen, start_frame, edited_page = edits.get(page, (0, original, original))
+    if page in edits and f"{key}_{sig}_p{page}_g{gen}" not in st.session_state:
+        gen, start_frame = gen + 1, edited_page
+    edited_page = st.data_editor(start_frame, num_rows="dynamic", key=f"{key}_{sig}_p{page}_g{gen}")
+    edits[page] = (gen, start_frame, edited_page)
+    st.session_state[state_key] = (sig, edits)
 
-    # Optionally, return edited df for further processing
-    return edited_df
+    pieces = [edits[p][2] if p in edits else df.iloc[(p - 1) * page_size:p * page_size]
+              for p in range(1, n_pages + 1)]
+    return pd.concat(pieces, ignore_index=True)
 
 
 # -------------------------------
@@ -0,0 +1,199 @@
+# api.py — Headless scan API (runs separately from the Streamlit UI)
+#
+# Usage:
+#   uvicorn src.api:app --workers 4 --port 8000
+#
+# Endpoints:
+#   POST /ocr      multipart image upload  → OCR lines + tokens (barcode hit: product + tokens, no OCR)
+#   GET  /products/{code}  product from the local OpenFoodFacts store (see src/barcode.py)
+#   POST /match    {"tokens": [...], "k": 3} → best DB record per token (or null), top-k candidates
+#   POST /analyze  {"tokens": [...]} or {"text": "..."} → analysis rows (cached per product, see src/result_cache.py)
+#   GET  /metrics  per-stage timing histograms (Prometheus text format)
+#
+# The ingredient DB and the EasyOCR reader are loaded once per worker at startup.
+# CPU-bound work runs in a thread pool so the event loop keeps accepting requests,
+# and /match + /analyze calls go through the shared MatchCoalescer, so tokens from
+# requests arriving within a few milliseconds of each other are scored together.
+import asyncio
+import io
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from src import metrics
+from src.tokenizer import tokenize_ocr_lines, tokenize_text
+
+# -------------------------------
+# Config (env overrides)
+# -------------------------------
+CPU_WORKERS = int(os.environ.get("VIVEKA_API_CPU_WORKERS", os.cpu_count() or 1))
+# Threads parked in the coalescer mostly wait, so allow many more than CPUs
+MATCH_WORKERS = int(os.environ.get("VIVEKA_API_MATCH_WORKERS", "64"))
+PRELOAD_OCR = os.environ.get("VIVEKA_API_PRELOAD_OCR", "1") == "1"
+# Request size limits; larger requests get a 422 instead of tying up a worker
+MAX_TOKENS = int(os.environ.get("VIVEKA_API_MAX_TOKENS", "1000"))
+MAX_TEXT_CHARS = int(os.environ.get("VIVEKA_API_MAX_TEXT_CHARS", "50000"))
+MAX_K = 10
+
+
+# -------------------------------
+# Request Models
+# -------------------------------
+class MatchRequest(BaseModel):
+    tokens: list[str] = Field(max_length=MAX_TOKENS)
+    threshold: int = Field(80, ge=0, le=100)
+    k: int = Field(1, ge=1, le=MAX_K)       # >1 adds top-k "candidates" per token
+    confidences: list[float | None] | None = Field(None, max_length=MAX_TOKENS)  # OCR confidence (0-100) per token
+
+
+class AnalyzeRequest(BaseModel):
+    tokens: list[str] | None = Field(None, max_length=MAX_TOKENS)
+    text: str | None = Field(None, max_length=MAX_TEXT_CHARS)
+    threshold: int = Field(80, ge=0, le=100)
+    confidences: list[float | None] | None = Field(None, max_length=MAX_TOKENS)  # aligned with 'tokens' (e.g. from /ocr)
+
+
+# -------------------------------
+# App Lifecycle
+# -------------------------------
+state = {}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="viveka-cpu")
+    loop = asyncio.get_running_loop()
+
+    # Load models once per worker, off the event loop
+    from src.matcher import get_ingredient_db, start_db_watcher
+    await loop.run_in_executor(executor, get_ingredient_db)
+    start_db_watcher()  # hot-swap data/items.csv edits without restarting workers
+    if PRELOAD_OCR:
+        from src.ocr_utils import get_reader
+        await loop.run_in_executor(executor, get_reader)
+
+    state["executor"] = executor
+    state["match_executor"] = ThreadPoolExecutor(max_workers=MATCH_WORKERS, thread_name_prefix="viveka-match")
+    yield
+    executor.shutdown(wait=False)
+    state["match_executor"].shutdown(wait=False)
+
+
+app = FastAPI(title="Viveka Scan API", lifespan=lifespan)
+
+
+async def _match(tokens, threshold, k=1, confidences=None):
+    from src.matcher import coalescer, get_ingredient_db
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        state["match_executor"], coalescer.match_candidates,
+        tokens, get_ingredient_db(), threshold, k, confidences,
+    )
+
+
+def _clean(record):
+    if record is None:
+        return None
+    return {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in record.items()}
+
+
+# -------------------------------
+# Endpoints
+# -------------------------------
+@app.get("/health")
+async def health():
+    from src.matcher import db_status
+
+    return {"status": "ok", "db": db_status}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    # Stage histograms (empty unless VIVEKA_METRICS=1)
+    return metrics.render_prometheus()
+
+
+@app.get("/products/{code}")
+async def product(code: str):
+    from src.barcode import lookup_product, product_tokens
+
+    found = lookup_product(code) if code.isdigit() else None
+    if found is None:
+        raise HTTPException(status_code=404, detail="Product not found.")
+    return {"product": found, "tokens": product_tokens(found)}
+
+
+@app.post("/ocr")
+async def ocr(file: UploadFile = File(...)):
+    from src.barcode import product_tokens, scan_barcode
+    from src.ocr_utils import extract_text
+
+    data = await file.read()
+    loop = asyncio.get_running_loop()
+    code, found = await loop.run_in_executor(state["executor"], scan_barcode, io.BytesIO(data))
+    if found is not None:
+        tokens = product_tokens(found)
+        return {"barcode": code, "product": found, "lines": [], "tokens": tokens,
+                "confidences": [None] * len(tokens)}
+    try:
+        lines = await loop.run_in_executor(state["executor"], extract_text, io.BytesIO(data))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not read text: {e}")
+    tokens, confidences = tokenize_ocr_lines(lines)
+    return {"lines": lines, "tokens": tokens, "confidences": confidences}
+
+
+@app.post("/match")
+async def match(req: MatchRequest):
+    if req.confidences is not None and len(req.confidences) != len(req.tokens):
+        raise HTTPException(status_code=422, detail="'confidences' must align with 'tokens'.")
+    results = await _match(req.tokens, req.threshold, req.k, req.confidences)
+    matches = []
+    for r in results:
+        entry = {"token": r.token, "match": _clean(r.item), "score": round(r.score, 2)}
+        if req.k > 1:
+            entry["candidates"] = [
+                {"ingredient": c["ingredient"], "score": c["score"], "combined": c["combined"]}
+                for c in r.candidates
+            ]
+        matches.append(entry)
+    return {"matches": matches}
+
+
+@app.post("/analyze")
+async def analyze(req: AnalyzeRequest):
+    from src.analyzer import analyze_ingredients
+    from src.matcher import MatchedRows
+    from src.result_cache import cached_rows, get_result_cache, product_key, store_rows
+
+    if req.tokens is None and req.text is None:
+        raise HTTPException(status_code=422, detail="Provide either 'tokens' or 'text'.")
+    tokens = req.tokens if req.tokens is not None else tokenize_text(req.text)
+    confidences = req.confidences if req.tokens is not None else None
+    if len(tokens) > MAX_TOKENS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_TOKENS} ingredients per request.")
+    if confidences is not None and len(confidences) != len(tokens):
+        raise HTTPException(status_code=422, detail="'confidences' must align with 'tokens'.")
+
+    # A product analysed before (by any worker) skips matching entirely
+    loop = asyncio.get_running_loop()
+    cache = get_result_cache()
+    key = product_key(tokens, req.threshold, confidences) if cache is not None and tokens else None
+    if key is not None:
+        rows = await loop.run_in_executor(state["executor"], cached_rows, cache, key, tokens)
+        if rows is not None:
+            return {"tokens": tokens, "ingredients": rows, "cached": True}
+
+    results = await _match(tokens, req.threshold, confidences=confidences)
+    matched_items = MatchedRows.from_results(results)
+    analysis_df = await loop.run_in_executor(state["executor"], analyze_ingredients, matched_items)
+    rows = [_clean(r) for r in analysis_df.to_dict("records")]
+    if key is not None:
+        await loop.run_in_executor(state["executor"], store_rows, cache, key, tokens, rows, results)
+    return {"tokens": tokens, "ingredients": rows, "cached": False}
@@ -0,0 +1,283 @@
+# barcode.py — EAN/UPC decoding and a local OpenFoodFacts product store
+#
+# Usage:
+#   python -m src.barcode import en.openfoodfacts.org.products.csv.gz   # or .jsonl(.gz)
+#   python -m src.barcode lookup 3017620422003
+#
+# The dump is imported once into an SQLite table keyed by barcode (a WITHOUT
+# ROWID primary key, so a lookup is a single B-tree probe). The app, the API
+# and the batch scanner call scan_barcode() before OCR; a hit returns the
+# product's ingredient list and OCR is skipped. Re-importing while they run is
+# picked up on each thread's next lookup.
+#
+#   VIVEKA_PRODUCTS_DB    path of the product store (default: data/products.db)
+#
+# Decoding needs the optional `pyzbar` package (and the zbar library); without
+# it scan_barcode() finds nothing and every image goes through OCR as before.
+import argparse
+import csv
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+from src.metrics import span
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Project root
+PRODUCTS_DB = os.environ.get("VIVEKA_PRODUCTS_DB", os.path.join(BASE_DIR, "data", "products.db"))
+
+BARCODE_TYPES = {"EAN13", "EAN8", "UPCA", "UPCE"}
+IMPORT_BATCH = 10_000
+
+_local = threading.local()
+_pyzbar_missing = False
+
+
+# -------------------------------
+# Decoding
+# -------------------------------
+def _valid_check_digit(code):
+    digits = [int(c) for c in code]
+    body, check = digits[:-1], digits[-1]
+    # Weights 3,1,3,1... from the digit next to the check digit (EAN-8/12/13 alike)
+    total = sum(d * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(body)))
+    return (10 - total % 10) % 10 == check
+
+
+def _expand_upce(code):
+    """UPC-E (8 digits) to the equivalent UPC-A, which is what product databases store."""
+    ns, b, check = code[0], code[1:7], code[7]
+    last = b[5]
+    if last in "012":
+        body = b[0:2] + last + "0000" + b[2:5]
+    elif last == "3":
+        body = b[0:3] + "00000" + b[3:5]
+    elif last == "4":
+        body = b[0:4] + "00000" + b[4]
+    else:
+        body = b[0:5] + "0000" + last
+    return ns + body + check
+
+
+def decode_barcodes(image_file):
+    """
+    Decode EAN-13/EAN-8/UPC-A/UPC-E barcodes from an image.
+    :param image_file: Path, file object or BytesIO of the uploaded image
+    :return: List of digit strings with a valid check digit (may be empty)
+    """
+    global _pyzbar_missing
+    if _pyzbar_missing:
+        return []
+    try:
+        from pyzbar import pyzbar
+    except ImportError:  # package or the zbar shared library not installed
+        _pyzbar_missing = True
+        print("pyzbar not available; barcode lookup disabled")
+        return []
+    from PIL import Image
+
+    with span("barcode.decode"):
+        image = Image.open(image_file)
+        found = pyzbar.decode(image)
+    codes = []
+    for symbol in found:
+        if symbol.type not in BARCODE_TYPES:
+            continue
+        code = symbol.data.decode("ascii", errors="ignore")
+        if symbol.type == "UPCE" and len(code) == 8 and code.isdigit():
+            code = _expand_upce(code)
+        if code.isdigit() and _valid_check_digit(code) and code not in codes:
+            codes.append(code)
+    return codes
+
+
+def _code_variants(code):
+    # OpenFoodFacts stores UPC-A both as 12 digits and zero-padded to EAN-13
+    variants = [code]
+    if len(code) == 12:
+        variants.append("0" + code)
+    elif len(code) == 13 and code.startswith("0"):
+        variants.append(code[1:])
+    return variants
+
+
+# -------------------------------
+# Product Store
+# -------------------------------
+def _connect(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    # A re-import replaces the file; a connection to the old one would keep reading it
+    stamp = (path, st.st_ino, st.st_mtime_ns)
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.stamp != stamp:
+        if conn is not None:
+            conn.close()
+        # Read-only: many app/API threads read concurrently, only `import` writes
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        _local.conn, _local.stamp = conn, stamp
+    return conn
+
+
+def lookup_product(code, path=None):
+    """
+    Find a product in the local OpenFoodFacts store.
+    :param code: Barcode digits (EAN-13, EAN-8 or UPC-A)
+    :return: Dict with code, name, brand, ingredients_text — or None
+    """
+    conn = _connect(path or PRODUCTS_DB)
+    if conn is None:
+        return None
+    with span("barcode.lookup"):
+        for variant in _code_variants(code):
+            row = conn.execute(
+                "SELECT code, name, brand, ingredients_text FROM products WHERE code = ?", (variant,)
+            ).fetchone()
+            if row is not None:
+                return dict(row)
+    return None
+
+
+def scan_barcode(image_file):
+    """
+    Decode the image's barcode(s) and return the first one found in the store.
+    :param image_file: Path, file object or BytesIO (rewound afterwards for OCR)
+    :return: (code, product dict) or (None, None)
+    """
+    if not os.path.exists(PRODUCTS_DB):
+        return None, None
+    try:
+        codes = decode_barcodes(image_file)
+    except Exception as e:
+        print(f"Barcode decode failed: {e}")
+        codes = []
+    finally:
+        if hasattr(image_file, "seek"):
+            image_file.seek(0)
+    for code in codes:
+        product = lookup_product(code)
+        if product is not None:
+            return code, product
+    return None, None
+
+
+def product_tokens(product):
+    """
+    Ingredient tokens from a product's OpenFoodFacts ingredient text.
+    OpenFoodFacts marks allergens as _milk_; the underscores are dropped.
+    """
+    from src.tokenizer import tokenize_text
+
+    return tokenize_text((product.get("ingredients_text") or "").replace("_", ""))
+
+
+# -------------------------------
+# Dump Import
+# -------------------------------
+def _open_text(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace", newline="")
+    return open(path, encoding="utf-8", errors="replace", newline="")
+
+
+def _ingredients(record):
+    # Prefer the English list, then the product's main-language one
+    return record.get("ingredients_text_en") or record.get("ingredients_text") or ""
+
+
+def _first_brand(value):
+    if isinstance(value, list):
+        value = ",".join(value)
+    return (value or "").split(",")[0].strip()
+
+
+def iter_dump(path):
+    """
+    Yield (code, name, brand, ingredients_text) from an OpenFoodFacts dump:
+    the CSV export (tab-separated, .csv/.tsv, optionally gzipped) or the JSONL
+    export. Products without a barcode or ingredient list are skipped.
+    """
+    stem = path[:-3] if path.endswith(".gz") else path
+    with _open_text(path) as f:
+        if stem.endswith(".jsonl") or stem.endswith(".json"):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            csv.field_size_limit(sys.maxsize)
+            records = csv.DictReader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+        for r in records:
+            code = str(r.get("code") or "").strip()
+            ingredients = _ingredients(r).strip()
+            if code.isdigit() and ingredients:
+                yield code, (r.get("product_name") or "").strip(), _first_brand(r.get("brands")), ingredients
+
+
+def import_dump(dump_path, db_path=None):
+    """
+    Build the product store from a dump. Writes to a temporary file and swaps it
+    in with os.replace: a lookup already running finishes on the old store, and
+    the next lookup in every thread reopens the new one.
+    :return: Number of products stored
+    """
+    db_path = db_path or PRODUCTS_DB
+    tmp_path = db_path + ".importing"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("""
+        CREATE TABLE products (
+            code TEXT PRIMARY KEY,
+            name TEXT,
+            brand TEXT,
+            ingredients_text TEXT
+        ) WITHOUT ROWID
+    """)
+    sql = "INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?)"
+    count = 0
+    batch = []
+    for row in iter_dump(dump_path):
+        batch.append(row)
+        if len(batch) >= IMPORT_BATCH:
+            conn.executemany(sql, batch)
+            count += len(batch)
+            batch = []
+            print(f"  {count} products...", end="\r")
+    if batch:
+        conn.executemany(sql, batch)
+        count += len(batch)
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    os.replace(tmp_path, db_path)
+    print(f"Imported {count} products into {db_path}")
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local OpenFoodFacts barcode store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="Import an OpenFoodFacts CSV/JSONL dump")
+    imp.add_argument("dump")
+    imp.add_argument("--db", default=PRODUCTS_DB)
+    look = sub.add_parser("lookup", help="Look up a barcode")
+    look.add_argument("code")
+    look.add_argument("--db", default=PRODUCTS_DB)
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        import_dump(args.dump, args.db)
+    else:
+        product = lookup_product(args.code, args.db)
+        print(json.dumps(product, indent=2, ensure_ascii=False) if product else "Not found")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+# batch.py — Headless catalog scanner
+#
+# Usage:
+#   python -m src.batch <dir-or-zip> --out results.jsonl [--format jsonl|csv|parquet]
+#                       [--workers N] [--max-in-flight M] [--threshold 80] [--no-resume]
+#
+# Runs extract_text → tokenization → match_ingredients → analyze_ingredients over
+# every label image (.jpg/.jpeg/.png) and ingredient list (.txt) in the input,
+# across a process pool (images whose barcode is in the local product store, see
+# src/barcode.py, skip OCR). Results are streamed to the output as they finish, and
+# every finished source is appended to `<out>.done`, so an interrupted run picks
+# up where it stopped when started again with the same --out.
+import argparse
+import csv
+import glob
+import io
+import json
+import os
+import re
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from src.analyzer import ANALYSIS_COLUMNS
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png"}
+TEXT_EXTS = {".txt"}
+FORMATS = ("jsonl", "csv", "parquet")
+
+
+# -------------------------------
+# Input Discovery
+# -------------------------------
+def _kind(name):
+    ext = os.path.splitext(name)[1].lower()
+    if ext in IMAGE_EXTS:
+        return "image"
+    if ext in TEXT_EXTS:
+        return "text"
+    return None
+
+
+def iter_sources(input_path):
+    """
+    Yield (source_id, kind, loader) for every scannable file in a directory or zip.
+    `loader()` returns a path or bytes; zip members are only read when called,
+    so at most `max_in_flight` payloads are held in memory at once.
+    """
+    if os.path.isdir(input_path):
+        for root, dirs, files in os.walk(input_path):
+            dirs.sort()
+            for name in sorted(files):
+                kind = _kind(name)
+                if kind:
+                    path = os.path.join(root, name)
+                    yield os.path.relpath(path, input_path), kind, (lambda p=path: p)
+    elif zipfile.is_zipfile(input_path):
+        with zipfile.ZipFile(input_path) as zf:
+            for info in zf.infolist():
+                if info.is_dir() or info.filename.startswith("__MACOSX/"):
+                    continue
+                kind = _kind(info.filename)
+                if kind:
+                    yield info.filename, kind, (lambda i=info: zf.read(i))
+    else:
+        raise ValueError(f"Input must be a directory or a .zip archive: {input_path}")
+
+
+# -------------------------------
+# Worker Side
+# -------------------------------
+def _init_worker():
+    """The pool already runs one scan per core, so each scan scores on one thread."""
+    from src import matcher
+    matcher.SCORE_WORKERS = 1
+
+
+def _scan_one(source, kind, payload, threshold):
+    """
+    Run the full pipeline for one source inside a pool worker.
+    Heavy modules are imported here so text-only batches never load EasyOCR.
+    """
+    from src.tokenizer import tokenize_ocr_lines, tokenize_text
+    from src.matcher import MatchedRows, match_candidates, get_ingredient_db
+    from src.analyzer import analyze_ingredients
+    from src.result_cache import cached_analysis
+
+    result = {"source": source, "barcode": None, "tokens": [], "ingredients": [], "error": None}
+    try:
+        if kind == "image":
+            from src.barcode import product_tokens, scan_barcode
+            from src.ocr_utils import extract_text
+            image_file = io.BytesIO(payload) if isinstance(payload, bytes) else payload
+            code, product = scan_barcode(image_file)
+            if product is not None:
+                result["barcode"] = code
+                tokens, confidences = product_tokens(product), None
+            else:
+                tokens, confidences = tokenize_ocr_lines(extract_text(image_file))
+        else:
+            confidences = None
+            if isinstance(payload, bytes):
+                text = payload.decode("utf-8", errors="replace")
+            else:
+                with open(payload, encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+            tokens = tokenize_text(text)
+
+        def compute():
+            matches = match_candidates(tokens, get_ingredient_db(), threshold, k=1, confidences=confidences)
+            return analyze_ingredients(MatchedRows.from_results(matches)), matches
+
+        # Catalogs repeat products; the shared result cache skips matching for those
+        result["ingredients"], _ = cached_analysis(tokens, threshold, compute, confidences)
+        result["tokens"] = tokens
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+# -------------------------------
+# Output Writers
+# -------------------------------
+class _Writer:
+    """
+    Base writer: `write()` buffers a result, `committed()` returns the sources
+    whose rows have been flushed to disk since the last call, and `written` holds
+    the sources an earlier run already wrote to the output.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.written = set()
+        self._pending = []
+
+    def write(self, result):
+        self._write(result)
+        self._pending.append(result["source"])
+
+    def committed(self):
+        self._flush()
+        done, self._pending = self._pending, []
+        return done
+
+    def close(self):
+        """Flush, close, and return the sources committed by the final flush."""
+        done = self.committed()
+        self._close()
+        return done
+
+    def _close(self):
+        pass
+
+    @staticmethod
+    def _flat_rows(result):
+        rows = result["ingredients"] or [{}]
+        for row in rows:
+            yield {
+                "source": result["source"],
+                **{col: row.get(col) for col in ANALYSIS_COLUMNS},
+                "error": result["error"],
+            }
+
+
+def _complete_text(path):
+    """
+    Text of the complete lines in an existing output file. A run killed in the
+    middle of a flush can leave a partial last line; it is cut off here so the
+    resumed run appends after the last complete one.
+    """
+    if not os.path.exists(path):
+        return ""
+    with open(path, "rb") as f:
+        data = f.read()
+    keep = data.rfind(b"\n") + 1
+    if keep < len(data):
+        os.truncate(path, keep)
+    return data[:keep].decode("utf-8", errors="replace")
+
+
+class JsonlWriter(_Writer):
+    def __init__(self, path):
+        super().__init__(path)
+        # A kill between the flush and the `.done` append leaves rows whose source
+        # is not checkpointed; collect them so the resumed run skips those sources
+        for line in _complete_text(path).splitlines():
+            try:
+                self.written.add(json.loads(line)["source"])
+            except (ValueError, KeyError, TypeError):
+                continue
+        self._f = open(path, "a", encoding="utf-8")
+
+    def _write(self, result):
+        self._f.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+
+    def _flush(self):
+        self._f.flush()
+
+    def _close(self):
+        self._f.close()
+
+
+class CsvWriter(_Writer):
+    def __init__(self, path):
+        super().__init__(path)
+        # Same recovery as JsonlWriter: skip sources whose rows are already written
+        rows = csv.reader(io.StringIO(_complete_text(path), newline=""))
+        next(rows, None)
+        self.written.update(row[0] for row in rows if row)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._f = open(path, "a", newline="", encoding="utf-8")
+        self._csv = csv.DictWriter(self._f, fieldnames=["source", *ANALYSIS_COLUMNS, "error"])
+        if new_file:
+            self._csv.writeheader()
+
+    def _write(self, result):
+        self._csv.writerows(self._flat_rows(result))
+
+    def _flush(self):
+        self._f.flush()
+
+    def _close(self):
+        self._f.close()
+
+
+class ParquetWriter(_Writer):
+    """
+    Parquet files cannot be appended to and are unreadable until their footer is
+    written, so every `batch_size` sources go to their own complete file: `<out>`
+    first, then `<stem>.partN.parquet`. Each file is written under a temporary
+    name and renamed once closed, and only then are its sources committed, so
+    `.done` never lists rows a kill could lose. No file is created until the
+    first batch is full (or the run ends with unwritten rows).
+    """
+    def __init__(self, path, batch_size=200):
+        super().__init__(path)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow") from None
+
+        self._pa, self._pq = pa, pq
+        self._schema = pa.schema([(c, pa.string()) for c in ["source", *ANALYSIS_COLUMNS, "error"]])
+        self._rows = []
+        self._unflushed = []
+        self._batch_size = batch_size
+
+    def write(self, result):
+        self._rows.extend(self._flat_rows(result))
+        self._unflushed.append(result["source"])
+        if len(self._unflushed) >= self._batch_size:
+            self._write_file()
+
+    def _next_path(self):
+        stem, ext = os.path.splitext(self.path)
+        path, n = self.path, 1
+        while os.path.exists(path):
+            path = f"{stem}.part{n}{ext}"
+            n += 1
+        return path
+
+    def _write_file(self):
+        if not self._unflushed:
+            return
+        columns = {
+            name: [None if r[name] is None else str(r[name]) for r in self._rows]
+            for name in self._schema.names
+        }
+        path = self._next_path()
+        self._pq.write_table(self._pa.table(columns, schema=self._schema), path + ".tmp")
+        os.replace(path + ".tmp", path)
+        self._pending.extend(self._unflushed)
+        self._rows, self._unflushed = [], []
+
+    def _flush(self):
+        pass
+
+    def close(self):
+        self._write_file()
+        done, self._pending = self._pending, []
+        return done
+
+
+def _open_writer(path, fmt):
+    if fmt == "jsonl":
+        return JsonlWriter(path)
+    if fmt == "csv":
+        return CsvWriter(path)
+    if fmt == "parquet":
+        return ParquetWriter(path)
+    raise ValueError(f"Unsupported format: {fmt} (choose from {', '.join(FORMATS)})")
+
+
+# -------------------------------
+# Batch Runner
+# -------------------------------
+def _part_files(out_path):
+    """`<stem>.partN<ext>` files that Parquet runs wrote next to `out_path`."""
+    stem, ext = os.path.splitext(out_path)
+    part = re.compile(re.escape(stem) + r"\.part\d+" + re.escape(ext) + "$")
+    return [p for p in glob.glob(glob.escape(stem) + ".part*" + ext) if part.match(p)]
+
+
+def scan_batch(input_path, out_path, fmt=None, workers=None, threshold=80,
+               max_in_flight=None, resume=True):
+    """
+    Scan every image / text file in `input_path` and stream results to `out_path`.
+    :param input_path: Directory or .zip archive of labels
+    :param out_path: Output file; format inferred from extension unless `fmt` is given
+    :param workers: Process count (default: CPU count)
+    :param threshold: Match confidence threshold passed to match_ingredients
+    :param max_in_flight: Max sources submitted but not yet written (bounds memory)
+    :param resume: Skip sources already listed in `<out_path>.done`
+    :return: Dict with counts of scanned, skipped and failed sources
+    """
+    fmt = fmt or os.path.splitext(out_path)[1].lstrip(".").lower() or "jsonl"
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+
+    done_path = out_path + ".done"
+    if not resume:
+        for p in (out_path, done_path, *_part_files(out_path)):
+            if os.path.exists(p):
+                os.remove(p)
+    done = set()
+    if os.path.exists(done_path):
+        with open(done_path, encoding="utf-8") as f:
+            done = {line.rstrip("\n") for line in f if line.strip()}
+
+    stats = {"scanned": 0, "skipped": 0, "failed": 0}
+    writer = _open_writer(out_path, fmt)
+    # Sources written but not yet checkpointed when the last run was killed
+    done |= writer.written
+    checkpoint = open(done_path, "a", encoding="utf-8")
+
+    def record(result):
+        writer.write(result)
+        stats["scanned"] += 1
+        if result["error"]:
+            stats["failed"] += 1
+            print(f"FAILED {result['source']}: {result['error']}", file=sys.stderr)
+        for source in writer.committed():
+            checkpoint.write(source + "\n")
+        checkpoint.flush()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            pending = set()
+            for source, kind, loader in iter_sources(input_path):
+                if source in done:
+                    stats["skipped"] += 1
+                    continue
+                if len(pending) >= max_in_flight:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        record(fut.result())
+                pending.add(pool.submit(_scan_one, source, kind, loader(), threshold))
+            for fut in wait(pending).done:
+                record(fut.result())
+    finally:
+        for source in writer.close():
+            checkpoint.write(source + "\n")
+        checkpoint.close()
+
+    return stats
+
+
+# -------------------------------
+# CLI
+# -------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-scan a directory or zip of product labels.")
+    parser.add_argument("input", help="Directory or .zip of images (.jpg/.png) and ingredient lists (.txt)")
+    parser.add_argument("--out", required=True, help="Output file (.jsonl, .csv or .parquet)")
+    parser.add_argument("--format", choices=FORMATS, help="Override the format inferred from --out")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Max queued sources (default: 2 x workers)")
+    parser.add_argument("--threshold", type=int, default=80, help="Fuzzy match threshold (default 80)")
+    parser.add_argument("--no-resume", action="store_true", help="Start over instead of resuming")
+    args = parser.parse_args(argv)
+
+    stats = scan_batch(args.input, args.out, fmt=args.format, workers=args.workers,
+                       threshold=args.threshold, max_in_flight=args.max_in_flight,
+                       resume=not args.no_resume)
+    print(f"Scanned {stats['scanned']} (failed {stats['failed']}), skipped {stats['skipped']} already done.")
+
+
+if __name__ == "__main__":
+    main()
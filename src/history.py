@@ -0,0 +1,154 @@
+# history.py — Per-user scan history (raw records for src/analytics.py)
+#
+# Every checked ingredient list is appended to two tables in users.db:
+#   scans       one row per check (who, when, source, product, risk level)
+#   scan_items  one row per matched ingredient of that check
+# Writes are small single-transaction appends; the analytics job reads them
+# incrementally by scan id and never rewrites them.
+#
+#   VIVEKA_HISTORY=0   don't record scans
+import hashlib
+import os
+import sqlite3
+import time
+
+from src.profile_store import DB_FILE
+
+ENABLED = os.environ.get("VIVEKA_HISTORY", "1") == "1"
+
+SOURCES = ("manual", "ocr", "barcode")
+RISK_LEVELS = ("low", "medium", "high")
+# Analysis "Side Effects" values that don't raise a scan's risk level
+BENIGN_EFFECTS = {"Minimal", "Generally safe", "None", ""}
+
+_db_ready = False
+
+
+def _connect():
+    conn = sqlite3.connect(DB_FILE, timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL")  # app sessions write while the analytics job reads
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def init_history_db():
+    """
+    Create the scans / scan_items tables (once per process).
+    """
+    global _db_ready
+    if _db_ready:
+        return
+    conn = _connect()
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS scans (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts REAL NOT NULL,
+        username TEXT,
+        source TEXT,
+        product_id TEXT,
+        product_label TEXT,
+        barcode TEXT,
+        n_tokens INTEGER,
+        n_matched INTEGER,
+        risk TEXT
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS scan_items (
+        scan_id INTEGER NOT NULL REFERENCES scans(id),
+        ingredient TEXT,
+        category TEXT,
+        side_effects TEXT,
+        prescription TEXT
+    )''')
+    c.execute("CREATE INDEX IF NOT EXISTS scan_items_scan ON scan_items (scan_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS scans_user ON scans (username, id)")
+    conn.commit()
+    conn.close()
+    _db_ready = True
+
+
+def product_id(tokens):
+    """
+    Stable id for an ingredient list: sha256 of its casefolded, sorted tokens.
+    Unlike the result cache key it ignores the DB version, so a product keeps
+    one id across DB updates.
+    """
+    parts = sorted({" ".join(str(t).casefold().split()) for t in tokens} - {""})
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()[:20]
+
+
+def _text(value):
+    # Analysis cells can be NaN/None when the DB row has gaps
+    return None if value is None or value != value else str(value)
+
+
+def scan_risk(rows):
+    """
+    Risk level of one scan from its analysis rows:
+    "high" if anything needs a prescription, "medium" if any side effect is
+    listed, else "low".
+    """
+    if any(_text(r.get("Prescription Required")) == "Yes" for r in rows):
+        return "high"
+    if any((_text(r.get("Side Effects")) or "") not in BENIGN_EFFECTS for r in rows):
+        return "medium"
+    return "low"
+
+
+def record_scan(username, tokens, analysis_df, source="manual", barcode=None, label=None):
+    """
+    Append one checked ingredient list to the history. Failures are logged
+    and swallowed so history can never break a scan.
+    :param username: Logged-in user (None for anonymous)
+    :param tokens: Checked tokens
+    :param analysis_df: DataFrame from analyze_ingredients (ANALYSIS_COLUMNS)
+    :param source: "manual", "ocr" or "barcode"
+    :param barcode: EAN/UPC if the list came from a barcode lookup
+    :param label: Display name (product name); defaults to the first tokens
+    :return: New scan id, or None if not recorded
+    """
+    if not ENABLED or not tokens:
+        return None
+    rows = analysis_df.to_dict("records")
+    label = label or ", ".join(tokens[:3]) + ("…" if len(tokens) > 3 else "")
+    try:
+        init_history_db()
+        conn = _connect()
+        try:
+            with conn:
+                cur = conn.execute(
+                    '''INSERT INTO scans (ts, username, source, product_id, product_label, barcode,
+                                          n_tokens, n_matched, risk)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                    (time.time(), username, source, product_id(tokens), label, barcode,
+                     len(tokens), len(rows), scan_risk(rows)),
+                )
+                scan_id = cur.lastrowid
+                conn.executemany(
+                    "INSERT INTO scan_items (scan_id, ingredient, category, side_effects, prescription) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(scan_id, _text(r.get("Ingredient")), _text(r.get("Category")),
+                      _text(r.get("Side Effects")), _text(r.get("Prescription Required"))) for r in rows],
+                )
+        finally:
+            conn.close()
+        return scan_id
+    except sqlite3.Error as e:
+        print(f"Could not record scan: {e}")
+        return None
+
+
+def user_scans(username, limit=50):
+    """
+    Most recent scans of one user, newest first.
+    :return: List of dicts (id, ts, source, product_label, barcode, n_tokens, n_matched, risk)
+    """
+    init_history_db()
+    conn = _connect()
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(
+        '''SELECT id, ts, source, product_label, barcode, n_tokens, n_matched, risk
+           FROM scans WHERE username = ? ORDER BY id DESC LIMIT ?''',
+        (username, limit),
+    ).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
@@ -1,6 +1,13 @@
-import pandas as pd
+import hashlib
 import os
-from rapidfuzz import process, fuzz
+import threading
+import time
+
+from src.metrics import span
+from src import transliteration
+
+# pandas, numpy and rapidfuzz are imported on first use (see get_ingredient_db
+# and match_tokens), so importing this module is cheap for pages that never match.
 
 # -------------------------------
 # Load Database (CSV → DataFrame)
@@ -8,41 +15,701 @@ from rapidfuzz import process, fuzz
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Project root
 DATA_PATH = os.path.join(BASE_DIR, "data", "items.csv")
 
-try:
-    df = pd.read_csv(DATA_PATH)
-    # Clean column names
-    df.rename(columns=lambda x: x.strip(), inplace=True)
+# Environment overrides
+DB_WATCH_INTERVAL = float(os.environ.get("VIVEKA_DB_WATCH_INTERVAL", "2"))  # seconds; 0 = no watcher
+
+# (DataFrame, version) of the live DB. Readers take one reference; a reload
+# builds the replacement (and its indexes) off to the side and swaps this
+# tuple in one assignment, so a request never sees half an update.
+_snapshot = None
+_db_lock = threading.Lock()
+db_status = {"version": None, "rows": 0, "loaded_at": None, "reloads": 0, "error": None}
+
+
+def _file_version(data):
+    """Content hash of the DB file, so every worker process agrees on the version."""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _load_db(path=DATA_PATH):
+    """
+    Read the ingredient CSV.
+    :return: (DataFrame, version) — empty DataFrame and "missing" if the file is absent
+    """
+    import io
+    import pandas as pd
+
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        df = pd.read_csv(io.BytesIO(data))
+        # Clean column names
+        df.rename(columns=lambda x: x.strip(), inplace=True)
+
+        # Ensure 'Ingredient' column exists
+        if 'Ingredient' not in df.columns:
+            # Assume first column is ingredient name
+            df.rename(columns={df.columns[0]: 'Ingredient'}, inplace=True)
+
+        print(f"Loaded {len(df)} ingredients from {path}")
+        return df, _file_version(data)
+    except FileNotFoundError:
+        print(f"ERROR: File not found at {path}")
+        return pd.DataFrame(), "missing"  # Empty dataframe as fallback
+
+
+def _install(df, version):
+    global _snapshot
+    _snapshot = (df, version)
+    db_status.update(version=version, rows=len(df), loaded_at=time.time(), error=None)
+
+
+def get_db_snapshot():
+    """
+    Return (DataFrame, version) of the live ingredient DB, loading data/items.csv
+    on first call. Use this when the DB and its version must agree.
+    """
+    if _snapshot is None:
+        with _db_lock:
+            if _snapshot is None:
+                _install(*_load_db(DATA_PATH))
+    return _snapshot
+
+
+def get_ingredient_db():
+    """
+    Return the ingredient DataFrame, loading data/items.csv on first call.
+    """
+    return get_db_snapshot()[0]
+
+
+def get_db_version():
+    """
+    Version of the loaded ingredient DB (content hash of items.csv).
+    Caches of match/analysis results key on it.
+    """
+    return get_db_snapshot()[1]
+
+
+# -------------------------------
+# Hot Reload
+# -------------------------------
+def reload_ingredient_db(path=None):
+    """
+    Re-read items.csv and swap it in if its content changed. The new choice
+    index (and the Devanagari index, if one was in use) is built before the
+    swap, so the first request on the new version doesn't pay for it.
+    A file that fails to parse or has no rows keeps the current DB.
+    :return: True if a new version was installed
+    """
+    path = path or DATA_PATH
+    current_df, current_version = get_db_snapshot()
+    with span("db.reload"):
+        try:
+            df, version = _load_db(path)
+        except Exception as e:
+            db_status["error"] = f"{type(e).__name__}: {e}"
+            print(f"DB reload failed, keeping version {current_version}: {db_status['error']}")
+            return False
+        if version == current_version:
+            return False
+        if df.empty:
+            db_status["error"] = f"{path} is missing or empty"
+            print(f"DB reload skipped, keeping version {current_version}: {db_status['error']}")
+            return False
+
+        _names.get(df)
+        if _scripts.has(current_df):
+            _scripts.get(df)
+    with _db_lock:
+        _install(df, version)
+        db_status["reloads"] += 1
+    print(f"Ingredient DB updated: {current_version} -> {version}")
+    return True
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+def _watch(path, interval):
+    last = _stamp(path)
+    while True:
+        time.sleep(interval)
+        stamp = _stamp(path)
+        if stamp is None or stamp == last:
+            continue
+        # Let an in-progress write settle before reading
+        time.sleep(min(interval, 0.5))
+        last = _stamp(path) or stamp
+        reload_ingredient_db(path)
+
+
+_watcher = None
+
+
+def start_db_watcher(interval=None):
+    """
+    Poll items.csv for changes and hot-swap it (once per process; later calls are no-ops).
+    :param interval: Seconds between checks (default VIVEKA_DB_WATCH_INTERVAL; 0 disables)
+    :return: True if this call started the watcher
+    """
+    global _watcher
+    interval = DB_WATCH_INTERVAL if interval is None else interval
+    if interval <= 0:
+        return False
+    with _db_lock:
+        if _watcher is not None:
+            return False
+        _watcher = threading.Thread(target=_watch, args=(DATA_PATH, interval),
+                                    name="viveka-db-watcher", daemon=True)
+    _watcher.start()
+    return True
+
+
+def __getattr__(name):
+    # Backwards compatible `from src.matcher import df` (loads the DB on access)
+    if name == "df":
+        return get_ingredient_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# -------------------------------
+# Choice Index (built once per DataFrame)
+# -------------------------------
+# Rows scored per cdist call; bounds the float64 score matrix to CHUNK x len(df).
+SCORE_CHUNK = 16
+# Threads per cdist call (-1 = all cores). Processes that already run one matcher
+# per core, like the batch scanner's pool, set this to 1 to avoid cores² threads.
+SCORE_WORKERS = int(os.environ.get("VIVEKA_MATCH_WORKERS", "-1"))
+
+# Candidates scoring below this are not worth suggesting
+SUGGEST_MIN_SCORE = 50
+
+# OCR confidence (0-100) below which a token gets the wider fuzzy search:
+# threshold lowered by LOW_CONFIDENCE_SLACK and twice as many candidates.
+LOW_CONFIDENCE = 60
+LOW_CONFIDENCE_SLACK = 10
+
+# Optional alternate-name columns in items.csv, values separated by ";" or "|"
+ALIAS_COLUMNS = ("Aliases", "Alias", "Synonyms", "Other Names")
+
+# Optional Hindi/Marathi name columns (Devanagari), same separators as aliases
+LOCAL_NAME_COLUMNS = ("Hindi", "Marathi", "Hindi Name", "Marathi Name", "Local Names")
+
+class _PerFrameCache:
+    """
+    Values built from a DataFrame, keyed by its identity. Keeps the two most
+    recent frames: the live DB and the one a hot reload is replacing, so
+    requests still holding the old DB don't rebuild its index.
+    """
+    def __init__(self, build, stage):
+        self._build = build
+        self._stage = stage
+        self._entries = ()  # ((df, value), ...) — replaced atomically
+        self._lock = threading.Lock()
+
+    def has(self, df):
+        return any(frame is df for frame, _ in self._entries)
+
+    def get(self, df):
+        for frame, value in self._entries:
+            if frame is df:
+                return value
+        with self._lock:
+            for frame, value in self._entries:
+                if frame is df:
+                    return value
+            with span(self._stage):
+                value = self._build(df)
+            self._entries = ((df, value),) + self._entries[:1]
+        return value
+
+
+def _normalize(text):
+    return " ".join(str(text).casefold().split())
+
+
+def _split_names(value):
+    return [name.strip() for name in str(value).replace("|", ";").split(";") if name.strip()]
+
+
+def _build_index(df):
+    col = df['Ingredient']
+    valid = col.notna()
+    names = col[valid].astype(str).tolist()
+    labels = col.index[valid]
+
+    # Exact lookup: normalized name or alias -> first row label carrying it
+    exact = {}
+    for name, label in zip(names, labels):
+        exact.setdefault(_normalize(name), label)
+    for alias_col in ALIAS_COLUMNS:
+        if alias_col in df.columns:
+            for label, value in df[alias_col].dropna().items():
+                for alias in _split_names(value):
+                    exact.setdefault(_normalize(alias), label)
+    return names, labels, exact
+
+
+_names = _PerFrameCache(_build_index, "match.index")
+
+
+def _choices(df):
+    """
+    Return (names, labels) for the non-null Ingredient values of `df`,
+    cached per DataFrame.
+    """
+    names, labels, _ = _names.get(df)
+    return names, labels
+
+
+def _exact_index(df):
+    """Normalized name/alias -> row label map for `df` (cached with the choices)."""
+    return _names.get(df)[2]
+
+
+# -------------------------------
+# Devanagari Index (built on the first Devanagari token per DataFrame)
+# -------------------------------
+def _build_script_index(df):
+    names, labels = _choices(df)
+    deva_exact = {}
+    keys, key_labels = [], []
+    seen = set()
+
+    def add_key(text, label):
+        key = transliteration.phonetic_key(text)
+        if key and (key, label) not in seen:
+            seen.add((key, label))
+            keys.append(key)
+            key_labels.append(label)
+
+    for name, label in zip(names, labels):
+        add_key(name, label)
+    for column in LOCAL_NAME_COLUMNS + ALIAS_COLUMNS:
+        if column not in df.columns:
+            continue
+        for label, value in df[column].dropna().items():
+            for name in _split_names(value):
+                if transliteration.detect_script(name) == transliteration.DEVANAGARI:
+                    deva_exact.setdefault(transliteration.normalize_devanagari(name), label)
+                add_key(name, label)
+    return deva_exact, keys, key_labels
+
+
+_scripts = _PerFrameCache(_build_script_index, "match.script_index")
+
 
-    # Ensure 'Ingredient' column exists
-    if 'Ingredient' not in df.columns:
-        # Assume first column is ingredient name
-        df.rename(columns={df.columns[0]: 'Ingredient'}, inplace=True)
+def _devanagari_index(df):
+    """
+    (Devanagari exact map, phonetic keys, key labels) for `df`, built once.
+    Keys cover the Latin names plus every alias/local name, so a transliterated
+    token can be fuzzy-matched without comparing scripts.
+    """
+    return _scripts.get(df)
+
+
+# -------------------------------
+# Match Result
+# -------------------------------
+class MatchResult:
+    """
+    Outcome of matching one token.
+    `row` is the DB row label of the best match if it cleared the threshold,
+    else None; `item` reads that row as a dict on first access, so a match
+    costs only a label until someone needs the record.
+    `candidates` holds up to k dicts (ingredient, score, combined, row), best
+    first; `combined` is the match score weighted by the token's OCR confidence.
+    """
+    __slots__ = ("token", "_item", "score", "confidence", "candidates", "row", "db")
+
+    def __init__(self, token, item=None, score=0.0, confidence=None, candidates=(), row=None, db=None):
+        self.token = token
+        self._item = item
+        self.score = score
+        self.confidence = confidence
+        self.candidates = candidates
+        self.row = row
+        self.db = db
+
+    @property
+    def item(self):
+        if self._item is None and self.row is not None:
+            self._item = self.db.loc[self.row].to_dict()
+        return self._item
+
+    @property
+    def matched(self):
+        return self._item is not None or self.row is not None
+
+    def with_confidence(self, confidence, candidates):
+        return MatchResult(self.token, self._item, self.score, confidence, candidates, self.row, self.db)
+
+    def __repr__(self):
+        name = self.item.get("Ingredient") if self.item else None
+        return f"MatchResult(token={self.token!r}, match={name!r}, score={self.score:.1f})"
+
+
+class MatchedRows:
+    """
+    Compact result of match_ingredients: the matched row labels plus a
+    reference to the shared DB DataFrame — no per-match record copies.
+    `column()` / `to_frame()` gather whole columns at once; indexing or
+    iterating yields record dicts, as the old list-of-dicts result did.
+    """
+    __slots__ = ("db", "labels", "_positions")
+
+    def __init__(self, db, labels):
+        self.db = db
+        self.labels = list(labels)
+        self._positions = None
+
+    @classmethod
+    def from_results(cls, results, db=None):
+        """Matched rows of a list of MatchResult (all from the same DB)."""
+        matched = [r for r in results if r.matched]
+        if db is None:
+            db = next((r.db for r in matched), None)
+        return cls(db, [r.row for r in matched])
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, i):
+        # Like the list of item dicts this replaced: an int gives a dict, a slice a list
+        if isinstance(i, slice):
+            return [self.db.loc[label].to_dict() for label in self.labels[i]]
+        return self.db.loc[self.labels[i]].to_dict()
+
+    def __iter__(self):
+        for label in self.labels:
+            yield self.db.loc[label].to_dict()
+
+    def positions(self):
+        # One index lookup per MatchedRows, however many columns are gathered
+        if self._positions is None:
+            self._positions = self.db.index.get_indexer(self.labels)
+        return self._positions
+
+    def column(self, name):
+        """Values of one DB column for the matched rows (ndarray), or None if absent."""
+        if self.db is None or name not in self.db.columns:
+            return None
+        return self.db[name].array.take(self.positions()).to_numpy()
+
+    def to_frame(self, columns=None):
+        """The matched DB rows as a DataFrame (one take per column)."""
+        frame = self.db.take(self.positions())
+        return frame if columns is None else frame[columns]
 
-    print(f"Loaded {len(df)} ingredients from {DATA_PATH}")
-except FileNotFoundError:
-    print(f"ERROR: File not found at {DATA_PATH}")
-    df = pd.DataFrame()  # Empty dataframe as fallback
 
 # -------------------------------
 # Matcher Function
 # -------------------------------
+def _score_tokens(text_list, df, threshold=80, k=1):
+    """
+    Score all tokens against the DB in one vectorized cdist pass (chunked by
+    SCORE_CHUNK rows to bound memory). The best match and, for k > 1, the top-k
+    candidates are read off the same score matrix.
+    :return: List of MatchResult aligned with text_list (confidence unset)
+    """
+    if df.empty or 'Ingredient' not in df.columns:
+        return [MatchResult(t) for t in text_list]
+    names, labels = _choices(df)
+    return _score_choices(text_list, text_list, names, labels, df, threshold, k)
+
+
+def _score_choices(tokens, queries, choices, labels, df, threshold, k):
+    """
+    cdist `queries` against `choices` (row `labels` aligned) and build MatchResults
+    for `tokens` (the original text the queries were derived from). Candidates
+    are named by the row's Ingredient and listed once per row.
+    """
+    text_list = queries
+    if not choices or not text_list:
+        return [MatchResult(t) for t in tokens]
+
+    import numpy as np
+    from rapidfuzz import process, fuzz
+
+    kk = min(k, len(choices))
+    ingredient = df['Ingredient']
+    results = []
+    for start in range(0, len(text_list), SCORE_CHUNK):
+        chunk = text_list[start:start + SCORE_CHUNK]
+        with span("match.score"):
+            scores = process.cdist(chunk, choices, scorer=fuzz.token_sort_ratio,
+                                   dtype=np.float64, workers=SCORE_WORKERS)
+            # argmax keeps the first best choice, same as extractOne
+            best = scores.argmax(axis=1)
+            best_scores = scores[np.arange(len(chunk)), best]
+            if kk > 1:
+                top = np.argpartition(scores, -kk, axis=1)[:, -kk:]
+                top_scores = np.take_along_axis(scores, top, axis=1)
+                order = np.argsort(-top_scores, axis=1, kind="stable")
+                top = np.take_along_axis(top, order, axis=1)
+                top_scores = np.take_along_axis(top_scores, order, axis=1)
+        with span("match.records"):
+            for i, (token, pos, score) in enumerate(zip(tokens[start:start + SCORE_CHUNK], best, best_scores)):
+                row = labels[pos] if score >= threshold else None
+                candidates = ()
+                if kk > 1:
+                    rows = set()
+                    candidates = []
+                    for p, sc in zip(top[i], top_scores[i]):
+                        if sc >= SUGGEST_MIN_SCORE and labels[p] not in rows:
+                            rows.add(labels[p])
+                            candidates.append({"ingredient": str(ingredient[labels[p]]),
+                                               "score": round(float(sc), 2),
+                                               "combined": round(float(sc), 2), "row": labels[p]})
+                    candidates = tuple(candidates)
+                results.append(MatchResult(token, None, float(score), None, candidates, row, df))
+    return results
+
+
+def _with_confidence(results, confidences):
+    """
+    Attach per-token OCR confidence (0-100) and reweight candidate scores.
+    Returns new MatchResult objects; coalesced results are shared between callers.
+    """
+    if confidences is None:
+        return results
+    out = []
+    for r, conf in zip(results, confidences):
+        factor = 1.0 if conf is None else conf / 100
+        candidates = tuple({**c, "combined": round(c["score"] * factor, 2)} for c in r.candidates)
+        out.append(r.with_confidence(conf, candidates))
+    return out
+
+
+def _match_devanagari(tokens, df, threshold, k):
+    """
+    Match Devanagari tokens without touching the Latin fuzzy index:
+    local-name exact lookup, then the transliteration against the Latin exact
+    map, then phonetic-key fuzzy matching (see src/transliteration.py).
+    """
+    deva_exact, keys, key_labels = _devanagari_index(df)
+    exact = _exact_index(df)
+    results = [None] * len(tokens)
+    fuzzy = []
+    for i, tok in enumerate(tokens):
+        label = deva_exact.get(transliteration.normalize_devanagari(tok))
+        if label is None:
+            label = exact.get(_normalize(transliteration.transliterate(tok)))
+        if label is not None:
+            results[i] = MatchResult(tok, None, 100.0, row=label, db=df)
+        else:
+            fuzzy.append(i)
+    if fuzzy:
+        scored = _score_choices([tokens[i] for i in fuzzy],
+                                [transliteration.phonetic_key(tokens[i]) for i in fuzzy],
+                                keys, key_labels, df, threshold, k)
+        for i, r in zip(fuzzy, scored):
+            results[i] = r
+    return results
+
+
+def _match_adaptive(text_list, df, threshold, k, confidences, score_fn):
+    """
+    Script- and confidence-aware routing shared by match_candidates and the coalescer.
+    1. Exact/alias lookup for every token (dict hit, no fuzzy scoring).
+    2. Devanagari tokens go to the transliteration index (_match_devanagari);
+       tokens in other scripts, or with no letters, are left unmatched.
+    3. Latin misses with OCR confidence >= LOW_CONFIDENCE (or typed input) get
+       the standard fuzzy pass; low-confidence misses get the wider one.
+    `score_fn(tokens, df, threshold, k)` does the Latin fuzzy scoring.
+    """
+    results = [None] * len(text_list)
+    if df.empty or 'Ingredient' not in df.columns:
+        return _with_confidence([MatchResult(t) for t in text_list], confidences)
+
+    wide_threshold = max(0, threshold - LOW_CONFIDENCE_SLACK)
+    wide_k = k * 2 if k > 1 else k
+    routes = {(transliteration.LATIN, False): [], (transliteration.LATIN, True): [],
+              (transliteration.DEVANAGARI, False): [], (transliteration.DEVANAGARI, True): []}
+    with span("match.exact"):
+        exact = _exact_index(df)
+        for i, tok in enumerate(text_list):
+            label = exact.get(_normalize(tok))
+            if label is not None:
+                results[i] = MatchResult(tok, None, 100.0, row=label, db=df)
+                continue
+            script = transliteration.detect_script(tok)
+            if script not in (transliteration.LATIN, transliteration.DEVANAGARI):
+                results[i] = MatchResult(tok)
+                continue
+            conf = confidences[i] if confidences is not None else None
+            routes[(script, conf is not None and conf < LOW_CONFIDENCE)].append(i)
+
+    for (script, wide), positions in routes.items():
+        if not positions:
+            continue
+        pass_threshold, pass_k = (wide_threshold, wide_k) if wide else (threshold, k)
+        tokens = [text_list[i] for i in positions]
+        if script == transliteration.DEVANAGARI:
+            with span("match.devanagari"):
+                scored = _match_devanagari(tokens, df, pass_threshold, pass_k)
+        else:
+            scored = score_fn(tokens, df, pass_threshold, pass_k)
+        for i, r in zip(positions, scored):
+            results[i] = r
+    return _with_confidence(results, confidences)
+
+
+def match_candidates(text_list, df, threshold=80, k=3, confidences=None):
+    """
+    Match tokens and return the top-k candidates for each, for suggestions.
+    Exact name/alias hits skip fuzzy scoring; tokens with low OCR confidence
+    get a lower threshold and more candidates (see _match_adaptive).
+    :param text_list: List of strings (OCR output or manual input)
+    :param df: DataFrame of ingredients
+    :param threshold: Score the best candidate needs to count as a match
+    :param k: Candidates to keep per token (those scoring >= SUGGEST_MIN_SCORE)
+    :param confidences: Optional OCR confidence (0-100) per token; None = typed
+    :return: List of MatchResult aligned with text_list
+    """
+    return _match_adaptive(list(text_list), df, threshold, k, confidences, _score_tokens)
+
+
+def match_tokens(text_list, df, threshold=80):
+    """
+    Match each token to its best ingredient record.
+    :param text_list: List of strings (OCR output or manual input)
+    :param df: DataFrame of ingredients
+    :param threshold: Match confidence threshold (default 80)
+    :return: List aligned with text_list — ingredient dict, or None if no match
+    """
+    return [r.item for r in match_candidates(text_list, df, threshold, k=1)]
+
+
 def match_ingredients(text_list, df, threshold=80):
     """
     Match extracted text to ingredients DB using fuzzy matching.
     :param text_list: List of strings (OCR output or manual input)
     :param df: DataFrame of ingredients
     :param threshold: Match confidence threshold (default 80)
-    :return: List of matched ingredient dicts
+    :return: MatchedRows — matched row labels over `df`; iterating yields ingredient dicts
     """
-    matched_items = []
-    if df.empty or 'Ingredient' not in df.columns:
-        return matched_items
+    return MatchedRows.from_results(match_candidates(text_list, df, threshold, k=1), df)
+
+
+# -------------------------------
+# Request Coalescer
+# -------------------------------
+class _MatchRequest:
+    __slots__ = ("tokens", "df", "threshold", "k", "result", "error", "done")
+
+    def __init__(self, tokens, df, threshold, k):
+        self.tokens = tokens
+        self.df = df
+        self.threshold = threshold
+        self.k = k
+        self.result = None
+        self.error = None
+        self.done = False
+
+
+class MatchCoalescer:
+    """
+    Merge matcher calls from concurrent sessions into shared batches.
+
+    The first caller to arrive while no batch is running becomes the leader:
+    it collects other callers' tokens for up to `window_ms` (or until
+    `max_tokens` are queued), deduplicates them, scores the batch in one
+    vectorized pass and hands every caller its own slice. Callers arriving
+    while a batch runs queue up for the next one.
+
+    A leader that is alone and saw no concurrency on the previous batch skips
+    the window, so a single user is never delayed; under load the added
+    latency is bounded by `window_ms`.
+    """
+    def __init__(self, window_ms=2.0, max_tokens=512):
+        self.window = window_ms / 1000
+        self.max_tokens = max_tokens
+        self._cond = threading.Condition()
+        self._pending = []
+        self._pending_tokens = 0
+        self._busy = False
+        self._last_batch_size = 1
+
+    def match_candidates(self, text_list, df, threshold=80, k=3, confidences=None):
+        """
+        Drop-in for match_candidates() that shares work with concurrent callers.
+        The exact/alias pass runs in the calling thread; only fuzzy scoring is batched.
+        """
+        return _match_adaptive(list(text_list), df, threshold, k, confidences, self._score)
+
+    def _score(self, text_list, df, threshold, k):
+        req = _MatchRequest(text_list, df, threshold, k)
+        with self._cond:
+            self._pending.append(req)
+            self._pending_tokens += len(req.tokens)
+            if self._pending_tokens >= self.max_tokens:
+                self._cond.notify_all()
+            while not req.done and self._busy:
+                self._cond.wait()
+            if req.done:
+                return self._result(req)
+            self._busy = True
+            if self.window and (len(self._pending) > 1 or self._last_batch_size > 1):
+                deadline = time.monotonic() + self.window
+                while self._pending_tokens < self.max_tokens:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            batch, self._pending, self._pending_tokens = self._pending, [], 0
+            self._last_batch_size = len(batch)
+
+        try:
+            with span("match.batch"):
+                self._run(batch)
+        finally:
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+        return self._result(req)
+
+    def match_tokens(self, text_list, df, threshold=80):
+        """Drop-in for match_tokens() that shares work with concurrent callers."""
+        return [r.item for r in self.match_candidates(text_list, df, threshold, k=1)]
+
+    def match_ingredients(self, text_list, df, threshold=80):
+        """Drop-in for match_ingredients() that shares work with concurrent callers."""
+        return MatchedRows.from_results(self.match_candidates(text_list, df, threshold, k=1), df)
+
+    @staticmethod
+    def _result(req):
+        if req.error is not None:
+            raise req.error
+        return req.result
 
-    for word in text_list:
-        match = process.extractOne(word, df['Ingredient'], scorer=fuzz.token_sort_ratio)
-        if match and match[1] >= threshold:
-            ingredient_info = df[df['Ingredient'] == match[0]].to_dict('records')[0]
-            matched_items.append(ingredient_info)
-    return matched_items
+    @staticmethod
+    def _run(batch):
+        groups = {}
+        for req in batch:
+            groups.setdefault((id(req.df), req.threshold, req.k), []).append(req)
+        for group in groups.values():
+            first = group[0]
+            unique = list(dict.fromkeys(t for req in group for t in req.tokens))
+            try:
+                lookup = dict(zip(unique, _score_tokens(unique, first.df, first.threshold, first.k)))
+                for req in group:
+                    req.result = [lookup[t] for t in req.tokens]
+            except Exception as e:
+                for req in group:
+                    req.error = e
+            for req in group:
+                req.done = True
 
 
+# Shared by every Streamlit session in this process
+coalescer = MatchCoalescer(
+    window_ms=float(os.environ.get("VIVEKA_MATCH_WINDOW_MS", "2")),
+    max_tokens=int(os.environ.get("VIVEKA_MATCH_MAX_TOKENS", "512")),
+)
@@ -0,0 +1,257 @@
+# metrics.py — Per-stage timing for the scan pipeline
+#
+# Enable with VIVEKA_METRICS=1. When disabled, span() returns a shared no-op
+# context manager and timed() functions pay one flag check per call.
+#
+# Export (Prometheus text format):
+#   VIVEKA_METRICS_FILE=/path/viveka.prom   rewritten every VIVEKA_METRICS_INTERVAL s (default 10)
+#   VIVEKA_METRICS_PORT=9108                serves GET /metrics from a background thread
+#
+# Histograms are per process. Under `uvicorn --workers N` every worker exports
+# its own: the HTTP exporter takes the first free port of VIVEKA_METRICS_PORT ..
+# VIVEKA_METRICS_PORT + VIVEKA_METRICS_PORT_SPAN - 1 (default span 16; scrape the
+# whole range), and a "{pid}" in VIVEKA_METRICS_FILE gives each worker its own
+# file (without it, workers overwrite one another's). The API's own GET /metrics
+# answers from whichever worker takes the request.
+import functools
+import math
+import os
+import threading
+import time
+
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+METRIC_NAME = "viveka_stage_duration_seconds"
+
+_enabled = os.environ.get("VIVEKA_METRICS") == "1"
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+# -------------------------------
+# Histogram
+# -------------------------------
+class Histogram:
+    """Cumulative-bucket latency histogram for one pipeline stage."""
+    __slots__ = ("counts", "total", "count", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    self.counts[i] += 1
+                    break
+            self.total += seconds
+            self.count += 1
+
+    def quantile(self, q):
+        """Upper bucket bound containing quantile `q` (bucket resolution only)."""
+        with self._lock:
+            if not self.count:
+                return None
+            target = q * self.count
+            running = 0
+            for bound, c in zip(BUCKETS, self.counts):
+                running += c
+                if running >= target:
+                    return bound
+        return math.inf
+
+
+def _histogram(stage):
+    hist = _registry.get(stage)
+    if hist is None:
+        with _registry_lock:
+            hist = _registry.setdefault(stage, Histogram())
+    return hist
+
+
+# -------------------------------
+# Spans
+# -------------------------------
+class _Span:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _histogram(self.stage).observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(stage):
+    """
+    Time a block as `stage`:  with span("ocr.readtext"): ...
+    """
+    return _Span(stage) if _enabled else _NULL_SPAN
+
+
+def timed(stage):
+    """
+    Decorator form of span().
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _histogram(stage).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def is_enabled():
+    return _enabled
+
+
+def set_enabled(flag):
+    global _enabled
+    _enabled = bool(flag)
+
+
+def reset():
+    with _registry_lock:
+        _registry.clear()
+
+
+# -------------------------------
+# Reading & Export
+# -------------------------------
+def snapshot():
+    """
+    Summary rows per stage for the debug panel.
+    :return: List of dicts (stage, count, mean_ms, p50_ms, p95_ms, total_s)
+    """
+    rows = []
+    for stage in sorted(_registry):
+        hist = _registry[stage]
+        if not hist.count:
+            continue
+        rows.append({
+            "stage": stage,
+            "count": hist.count,
+            "mean_ms": round(hist.total / hist.count * 1000, 2),
+            "p50_ms": _ms(hist.quantile(0.5)),
+            "p95_ms": _ms(hist.quantile(0.95)),
+            "total_s": round(hist.total, 3),
+        })
+    return rows
+
+
+def _ms(bound):
+    return None if bound is None else (math.inf if bound == math.inf else bound * 1000)
+
+
+def render_prometheus():
+    """Render every stage histogram in the Prometheus text exposition format."""
+    lines = [
+        f"# HELP {METRIC_NAME} Time spent in each scan pipeline stage.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for stage in sorted(_registry):
+        hist = _registry[stage]
+        with hist._lock:
+            counts, total, count = list(hist.counts), hist.total, hist.count
+        running = 0
+        for bound, c in zip(BUCKETS, counts):
+            running += c
+            le = "+Inf" if bound == math.inf else repr(bound)
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{le}"}} {running}')
+        lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {total}')
+        lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    """Atomically write the metrics file (safe for node_exporter's textfile collector)."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, path)
+
+
+def start_file_exporter(path, interval=10.0):
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                write_prometheus(path)
+            except OSError:
+                pass
+
+    threading.Thread(target=loop, name="viveka-metrics-file", daemon=True).start()
+
+
+def start_http_server(port, host="127.0.0.1", span=1):
+    """
+    Serve GET /metrics on a background thread, on the first free port of
+    `port` .. `port + span - 1` (one per worker process).
+    :return: The running server (its port is `server.server_address[1]`)
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    for candidate in range(port, port + span):
+        try:
+            server = ThreadingHTTPServer((host, candidate), Handler)
+            break
+        except OSError:
+            if candidate == port + span - 1:
+                raise
+    threading.Thread(target=server.serve_forever, name="viveka-metrics-http", daemon=True).start()
+    return server
+
+
+# Exporters start once per process (Streamlit keeps this module imported across reruns)
+if _enabled and os.environ.get("VIVEKA_METRICS_FILE"):
+    start_file_exporter(os.environ["VIVEKA_METRICS_FILE"].replace("{pid}", str(os.getpid())),
+                        float(os.environ.get("VIVEKA_METRICS_INTERVAL", "10")))
+if _enabled and os.environ.get("VIVEKA_METRICS_PORT"):
+    _port = int(os.environ["VIVEKA_METRICS_PORT"])
+    _span = int(os.environ.get("VIVEKA_METRICS_PORT_SPAN", "16"))
+    try:
+        _server = start_http_server(_port, span=_span)
+        print(f"Metrics endpoint: http://127.0.0.1:{_server.server_address[1]}/metrics (pid {os.getpid()})")
+    except OSError as e:
+        print(f"Metrics endpoint not started (ports {_port}-{_port + _span - 1} busy): {e}")
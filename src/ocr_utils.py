@@ -1,21 +1,45 @@
-import easyocr
-import numpy as np
-from PIL import Image
+import threading
 
-# Initialize EasyOCR reader (English + Hindi + Marathi)
-reader = easyocr.Reader(['en', 'hi', 'mr'])
+from src.metrics import span
+
+# EasyOCR pulls in torch, so the reader is built on first use (or by the
+# background preload in src/preload.py) rather than at import time.
+OCR_LANGUAGES = ['en', 'hi', 'mr']
+
+_reader = None
+_reader_lock = threading.Lock()
+
+
+def get_reader():
+    """
+    Return the shared EasyOCR reader (English + Hindi + Marathi), creating it once.
+    """
+    global _reader
+    if _reader is None:
+        with _reader_lock:
+            if _reader is None:
+                import easyocr
+                _reader = easyocr.Reader(OCR_LANGUAGES)
+    return _reader
 
 def extract_text(image_file):
     """
     Extract text from an uploaded image using EasyOCR.
     Returns list of lines with confidence scores.
     """
+    import numpy as np
+    from PIL import Image
+
+    reader = get_reader()
+
     # Open image
-    image = Image.open(image_file)
-    image = np.array(image)
+    with span("ocr.decode"):
+        image = Image.open(image_file)
+        image = np.array(image)
 
     # Run OCR
-    results = reader.readtext(image)
+    with span("ocr.readtext"):
+        results = reader.readtext(image)
 
     # Collect text + confidence
     extracted_text = []
@@ -0,0 +1,53 @@
+# preload.py — Background warm-up of heavy modules
+#
+# Pages import src/ modules cheaply and load pandas, rapidfuzz, the ingredient
+# DB and the EasyOCR reader on first use. start_preload() does that work on a
+# daemon thread as soon as the server serves its first page, so the first scan
+# doesn't pay for it.
+#
+#   VIVEKA_PRELOAD=0        disable the warm-up entirely
+#   VIVEKA_PRELOAD_OCR=0    warm everything except the (torch-backed) OCR reader
+import os
+import threading
+import time
+
+_started = False
+_start_lock = threading.Lock()
+status = {"state": "idle", "seconds": None, "error": None}
+
+
+def _warm():
+    status["state"] = "running"
+    start = time.perf_counter()
+    try:
+        import pandas  # noqa: F401
+        import rapidfuzz.process  # noqa: F401
+        from src.matcher import get_ingredient_db
+        get_ingredient_db()
+
+        if os.environ.get("VIVEKA_PRELOAD_OCR", "1") == "1":
+            from src.ocr_utils import get_reader
+            get_reader()
+        status["state"] = "done"
+    except Exception as e:
+        status["state"] = "failed"
+        status["error"] = f"{type(e).__name__}: {e}"
+        print(f"Preload failed: {status['error']}")
+    finally:
+        status["seconds"] = round(time.perf_counter() - start, 2)
+
+
+def start_preload():
+    """
+    Start the warm-up thread once per process; later calls are no-ops.
+    :return: True if this call started it
+    """
+    global _started
+    if os.environ.get("VIVEKA_PRELOAD", "1") != "1":
+        return False
+    with _start_lock:
+        if _started:
+            return False
+        _started = True
+    threading.Thread(target=_warm, name="viveka-preload", daemon=True).start()
+    return True
@@ -0,0 +1,137 @@
+import sqlite3
+import threading
+
+# -------------------------------
+# Config
+# -------------------------------
+DB_FILE = "users.db"
+
+PROFILE_FIELDS = (
+    "username", "fullname", "age", "gender", "blood_group",
+    "allergies", "conditions", "medications", "profile_pic",
+)
+
+
+# -------------------------------
+# Profile Record
+# -------------------------------
+class Profile:
+    """
+    Typed view of one row of the `profiles` table.
+    Replaces the 9-tuple that used to be unpacked positionally on every page.
+    """
+    __slots__ = PROFILE_FIELDS
+
+    def __init__(self, username, fullname=None, age=None, gender=None, blood_group=None,
+                 allergies=None, conditions=None, medications=None, profile_pic=None):
+        self.username = username
+        self.fullname = fullname
+        self.age = age
+        self.gender = gender
+        self.blood_group = blood_group
+        self.allergies = allergies
+        self.conditions = conditions
+        self.medications = medications
+        self.profile_pic = profile_pic
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
+
+    def as_tuple(self):
+        return tuple(getattr(self, f) for f in PROFILE_FIELDS)
+
+    def __repr__(self):
+        return f"Profile(username={self.username!r}, fullname={self.fullname!r})"
+
+
+# -------------------------------
+# Process-wide Cache
+# -------------------------------
+# Streamlit runs every session of every page in the same process, so a
+# module-level dict is shared between pages/profile.py and pages/app.py.
+# `None` is cached too, so users without a profile don't hit the DB on each rerun.
+_cache = {}
+_lock = threading.Lock()
+_db_ready = False
+
+
+def init_profile_db():
+    """
+    Create the profiles table (once per process).
+    """
+    global _db_ready
+    if _db_ready:
+        return
+    conn = sqlite3.connect(DB_FILE)
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS profiles (
+        username TEXT PRIMARY KEY,
+        fullname TEXT,
+        age INTEGER,
+        gender TEXT,
+        blood_group TEXT,
+        allergies TEXT,
+        conditions TEXT,
+        medications TEXT,
+        profile_pic TEXT
+    )''')
+    conn.commit()
+    conn.close()
+    _db_ready = True
+
+
+def _load_profile(username):
+    conn = sqlite3.connect(DB_FILE)
+    c = conn.cursor()
+    c.execute(f"SELECT {', '.join(PROFILE_FIELDS)} FROM profiles WHERE username=?", (username,))
+    row = c.fetchone()
+    conn.close()
+    return Profile.from_row(row) if row else None
+
+
+def get_profile(username):
+    """
+    Return the cached Profile for `username`, reading the DB only on a miss.
+    :param username: Logged-in username
+    :return: Profile or None if the user has not saved one yet
+    """
+    with _lock:
+        if username in _cache:
+            return _cache[username]
+    init_profile_db()
+    profile = _load_profile(username)
+    with _lock:
+        # Another session may have saved in the meantime; keep the newer entry.
+        return _cache.setdefault(username, profile)
+
+
+def save_profile(username, fullname, age, gender, blood_group, allergies, conditions, medications, profile_pic):
+    """
+    Write the profile to the DB and refresh the cache entry (write-through).
+    :return: The saved Profile
+    """
+    init_profile_db()
+    profile = Profile(username, fullname, age, gender, blood_group,
+                      allergies, conditions, medications, profile_pic)
+    conn = sqlite3.connect(DB_FILE)
+    c = conn.cursor()
+    c.execute('''INSERT OR REPLACE INTO profiles
+        (username, fullname, age, gender, blood_group, allergies, conditions, medications, profile_pic)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''', profile.as_tuple())
+    conn.commit()
+    conn.close()
+    with _lock:
+        _cache[username] = profile
+    return profile
+
+
+def invalidate_profile(username=None):
+    """
+    Drop one cached profile (or all of them), e.g. after an out-of-band DB edit.
+    """
+    with _lock:
+        if username is None:
+            _cache.clear()
+        else:
+            _cache.pop(username, None)
@@ -0,0 +1,144 @@
+# profiling.py — On-demand scan profiling and slow-scan log
+#
+#   VIVEKA_PROFILE=1           cProfile every scan (otherwise only when requested, e.g. admin toggle)
+#   VIVEKA_PROFILE_DIR         where profile artifacts go (default: profiles/)
+#   VIVEKA_SLOW_SCAN_MS        latency threshold for the slow-scan log (default: 2000)
+#   VIVEKA_SLOW_SCAN_LOG       JSONL log of slow scans (default: logs/slow_scans.jsonl)
+#
+# Each profile artifact is a directory holding scan.prof (open with snakeviz or
+# pstats), a top-30 summary.txt, the input that triggered it, and meta.json.
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+PROFILE_ALWAYS = os.environ.get("VIVEKA_PROFILE") == "1"
+PROFILE_DIR = os.environ.get("VIVEKA_PROFILE_DIR", "profiles")
+SLOW_SCAN_MS = float(os.environ.get("VIVEKA_SLOW_SCAN_MS", "2000"))
+SLOW_SCAN_LOG = os.environ.get("VIVEKA_SLOW_SCAN_LOG", os.path.join("logs", "slow_scans.jsonl"))
+
+# Only one cProfile can be active per process; concurrent requests skip capture.
+_profiler_lock = threading.Lock()
+_log_lock = threading.Lock()
+
+
+class ScanRecord:
+    """Outcome of one profile_scan() block, filled in when the block exits."""
+    __slots__ = ("elapsed_ms", "artifact", "slow")
+
+    def __init__(self):
+        self.elapsed_ms = None
+        self.artifact = None
+        self.slow = False
+
+
+@contextmanager
+def profile_scan(kind, payload, filename=None, capture=False, meta=None):
+    """
+    Time one scan, cProfile it if requested, and log it if it was slow.
+    :param kind: "ocr" or "match" (used in artifact names)
+    :param payload: The scan input — image bytes or ingredient text
+    :param filename: Original upload name, used for the stored input's extension
+    :param capture: Profile this scan even without VIVEKA_PROFILE=1
+    :param meta: Extra JSON-serializable context (username, thresholds, ...)
+    :return: ScanRecord, populated after the block finishes
+    """
+    record = ScanRecord()
+    profiler = None
+    if (capture or PROFILE_ALWAYS) and _profiler_lock.acquire(blocking=False):
+        # Imported here: cProfile imports the stdlib `profile`, which pages/profile.py
+        # shadows whenever a page runs with pages/ on sys.path.
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiler (e.g. a debugger) is already active
+            profiler = None
+            _profiler_lock.release()
+
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+        if profiler is not None:
+            profiler.disable()
+            _profiler_lock.release()
+            record.artifact = _store_profile(profiler, kind, payload, filename, record.elapsed_ms, meta)
+        if record.elapsed_ms >= SLOW_SCAN_MS:
+            record.slow = True
+            _log_slow_scan(kind, payload, filename, record, meta)
+
+
+# -------------------------------
+# Storage
+# -------------------------------
+def _digest(payload):
+    data = payload.encode("utf-8") if isinstance(payload, str) else payload
+    return hashlib.sha256(data).hexdigest()
+
+
+def _input_name(payload, filename):
+    if isinstance(payload, str):
+        return "input.txt"
+    ext = os.path.splitext(filename or "")[1].lower() or ".bin"
+    return f"input{ext}"
+
+
+def _write_input(directory, payload, filename):
+    path = os.path.join(directory, _input_name(payload, filename))
+    if isinstance(payload, str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        with open(path, "wb") as f:
+            f.write(payload)
+    return path
+
+
+def _store_profile(profiler, kind, payload, filename, elapsed_ms, meta):
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    directory = os.path.join(PROFILE_DIR, f"{stamp}-{kind}-{_digest(payload)[:10]}")
+    os.makedirs(directory, exist_ok=True)
+
+    import pstats
+
+    profiler.dump_stats(os.path.join(directory, "scan.prof"))
+    buf = io.StringIO()
+    pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(30)
+    with open(os.path.join(directory, "summary.txt"), "w", encoding="utf-8") as f:
+        f.write(buf.getvalue())
+
+    _write_input(directory, payload, filename)
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"kind": kind, "elapsed_ms": elapsed_ms, "filename": filename,
+                   "sha256": _digest(payload), **(meta or {})}, f, indent=2, default=str)
+    return directory
+
+
+def _log_slow_scan(kind, payload, filename, record, meta):
+    digest = _digest(payload)
+    log_dir = os.path.dirname(SLOW_SCAN_LOG) or "."
+    # Keep the triggering input (once per distinct input) so the scan can be replayed
+    input_dir = os.path.join(log_dir, "slow_inputs", digest[:16])
+    entry = {
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "kind": kind,
+        "elapsed_ms": record.elapsed_ms,
+        "threshold_ms": SLOW_SCAN_MS,
+        "sha256": digest,
+        "filename": filename,
+        "input": input_dir,
+        "profile": record.artifact,
+        **(meta or {}),
+    }
+    with _log_lock:
+        if not os.path.isdir(input_dir):
+            os.makedirs(input_dir, exist_ok=True)
+            _write_input(input_dir, payload, filename)
+        with open(SLOW_SCAN_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
@@ -0,0 +1,243 @@
+# result_cache.py — Product-level cache of analysis results
+#
+# Many users scan the same products. The analysis of an ingredient list is
+# cached under a hash of its normalized, sorted tokens plus the ingredient DB
+# version, in an SQLite file shared by every Streamlit / API / batch process,
+# so a repeated product skips matching and analysis entirely. Only lists where
+# every token matched confidently are stored, one row per token, so a hit is
+# returned in the caller's token order and never hides a "Did you mean?"
+# correction the app would offer.
+#
+#   VIVEKA_RESULT_CACHE=0            disable the cache
+#   VIVEKA_RESULT_CACHE_PATH         SQLite file (default: cache/results.db)
+#   VIVEKA_RESULT_CACHE_TTL          seconds an entry stays valid (default: 7 days)
+#   VIVEKA_RESULT_CACHE_MAX_MB       total payload size kept (default: 64); least
+#                                    recently used entries are evicted beyond it
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from src.metrics import span
+
+ENABLED = os.environ.get("VIVEKA_RESULT_CACHE", "1") == "1"
+CACHE_PATH = os.environ.get("VIVEKA_RESULT_CACHE_PATH", os.path.join("cache", "results.db"))
+TTL_SECONDS = float(os.environ.get("VIVEKA_RESULT_CACHE_TTL", str(7 * 24 * 3600)))
+MAX_BYTES = int(float(os.environ.get("VIVEKA_RESULT_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+# Eviction runs every EVICT_EVERY writes (per process) rather than on each put
+EVICT_EVERY = 200
+# Last-access time is only rewritten when older than this, to keep reads read-only
+TOUCH_AFTER = 60
+# Tokens matched below this score (or not at all) get "Did you mean?" corrections
+# in the app, which need a fresh match, so lists containing one are not cached
+SUGGEST_BELOW_SCORE = 90
+
+
+def product_key(tokens, threshold=80, confidences=None):
+    """
+    Canonical cache key for an ingredient list.
+    Tokens are deduplicated and sorted, so the same label typed in a different
+    order hits the same entry. Their text is kept exactly: fuzzy scoring is
+    case- and spacing-sensitive, so "ASPARTME" and "Aspartme" can match
+    differently. OCR tokens below the matcher's LOW_CONFIDENCE are matched
+    differently too, so they are marked in the key.
+    :return: Hex sha256 string
+    """
+    from src.matcher import LOW_CONFIDENCE, get_db_version
+
+    parts = set()
+    for i, tok in enumerate(tokens):
+        norm = str(tok)
+        conf = confidences[i] if confidences is not None else None
+        if norm:
+            parts.add(norm + ("\x01" if conf is not None and conf < LOW_CONFIDENCE else ""))
+    payload = "\x00".join(["rows-by-token", get_db_version(), str(threshold), *sorted(parts)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _clean(value):
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def clean_rows(df):
+    """Analysis DataFrame as cacheable row dicts (NaN -> None, so the JSON stays standard)."""
+    return [{k: _clean(v) for k, v in row.items()} for row in df.to_dict("records")]
+
+
+def cacheable(results):
+    """True when every MatchResult matched at or above SUGGEST_BELOW_SCORE."""
+    return all(r.matched and r.score >= SUGGEST_BELOW_SCORE for r in results)
+
+
+def cached_rows(cache, key, tokens):
+    """
+    Analysis rows for `tokens` from the entry under `key`, in the order (and
+    with the repeats) of `tokens`, or None on a miss.
+    """
+    entry = cache.get(key)
+    if not isinstance(entry, dict):
+        return None
+    try:
+        return [entry[str(tok)] for tok in tokens]
+    except KeyError:
+        return None
+
+
+def store_rows(cache, key, tokens, rows, results):
+    """
+    Cache analysis `rows` under `key` if `results` (the MatchResults they came
+    from) are cacheable; rows then line up one per token and are stored by token.
+    """
+    if cacheable(results):
+        cache.put(key, dict(zip(map(str, tokens), rows)))
+
+
+class ResultCache:
+    """
+    JSON values in an SQLite table with TTL and size-bounded LRU eviction.
+    Safe to share between threads (one connection each) and processes (WAL).
+    """
+    def __init__(self, path=CACHE_PATH, ttl=TTL_SECONDS, max_bytes=MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """
+        :return: Cached value, or None if missing/expired (or the cache is unusable)
+        """
+        now = time.time()
+        try:
+            with span("cache.get"):
+                conn = self._conn()
+                row = conn.execute(
+                    "SELECT value, created, accessed FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or now - row[1] > self.ttl:
+                    self.misses += 1
+                    return None
+                if now - row[2] > TOUCH_AFTER:
+                    conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+                    conn.commit()
+        except sqlite3.Error as e:
+            print(f"Result cache read failed: {e}")
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        data = json.dumps(value, ensure_ascii=False, default=str)
+        now = time.time()
+        try:
+            with span("cache.put"):
+                conn = self._conn()
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, data, len(data), now, now),
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Result cache write failed: {e}")
+            return
+        with self._lock:
+            self._writes += 1
+            due = self._writes % EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        try:
+            conn = self._conn()
+            conn.execute("DELETE FROM results WHERE created < ?", (time.time() - self.ttl,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total > self.max_bytes:
+                # Evict down to 90% so the next few writes don't trigger it again
+                excess = total - int(self.max_bytes * 0.9)
+                cutoff = conn.execute("""
+                    SELECT accessed FROM (
+                        SELECT accessed, SUM(size) OVER (ORDER BY accessed) AS running
+                        FROM results
+                    ) WHERE running >= ? ORDER BY accessed LIMIT 1
+                """, (excess,)).fetchone()
+                if cutoff is not None:
+                    conn.execute("DELETE FROM results WHERE accessed <= ?", (cutoff[0],))
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Result cache eviction failed: {e}")
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM results")
+        conn.commit()
+
+    def stats(self):
+        count, total = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+        return {"entries": count, "bytes": total, "hits": self.hits, "misses": self.misses}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Process-wide ResultCache, or None when VIVEKA_RESULT_CACHE=0."""
+    global _cache
+    if not ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResultCache()
+    return _cache
+
+
+def cached_analysis(tokens, threshold, compute, confidences=None):
+    """
+    Return analysis rows for `tokens`, from the cache when possible.
+    :param compute: Called on a miss; returns (analysis DataFrame, list of MatchResult)
+    :return: (list of row dicts, hit) — rows have NaN replaced by None
+    """
+    cache = get_result_cache()
+    key = product_key(tokens, threshold, confidences) if cache is not None and tokens else None
+    if key is not None:
+        rows = cached_rows(cache, key, tokens)
+        if rows is not None:
+            return rows, True
+    analysis_df, results = compute()
+    rows = clean_rows(analysis_df)
+    if key is not None:
+        store_rows(cache, key, tokens, rows, results)
+    return rows, False
@@ -0,0 +1,81 @@
+from src.metrics import timed
+
+# -------------------------------
+# Tokenization Helpers
+# -------------------------------
+# Shared by the Home page, the batch scanner and the API so every entry point
+# splits ingredient text the same way.
+
+@timed("tokenize.ocr")
+def tokenize_ocr_lines(results):
+    """
+    Turn extract_text output into unique ingredient tokens plus the OCR
+    confidence of the line(s) each token came from.
+    :param results: List of {"text", "confidence"} dicts from extract_text
+    :return: (tokens, confidences) — tokens in first-seen order (case-insensitive
+             dedupe); a token seen on several lines keeps its highest confidence
+    """
+    tokens = []
+    confidences = []
+    position = {}
+    seen_lines = set()
+    for r in results:
+        line = (r.get("text") or "").strip()
+        if not line or line.lower() in seen_lines:
+            continue
+        seen_lines.add(line.lower())
+        conf = r.get("confidence")
+        for part in line.replace("/", ",").split(","):
+            p = part.strip()
+            if not p:
+                continue
+            key = p.lower()
+            if key not in position:
+                position[key] = len(tokens)
+                tokens.append(p)
+                confidences.append(conf)
+            elif conf is not None:
+                i = position[key]
+                confidences[i] = conf if confidences[i] is None else max(confidences[i], conf)
+    return tokens, confidences
+
+
+def tokenize_ocr_results(results):
+    """
+    Turn extract_text output into unique ingredient tokens.
+    :param results: List of {"text", "confidence"} dicts from extract_text
+    :return: List of tokens in first-seen order (case-insensitive dedupe)
+    """
+    return tokenize_ocr_lines(results)[0]
+
+
+@timed("tokenize.text")
+def tokenize_text(text):
+    """
+    Split a typed/pasted ingredient list (newlines or commas) into unique tokens.
+    :param text: Raw text from the text area or a .txt file
+    :return: List of tokens in first-seen order (case-insensitive dedupe)
+    """
+    tokens = []
+    seen = set()
+    for line in text.splitlines():
+        for tok in line.split(","):
+            t = tok.strip()
+            if t and t.lower() not in seen:
+                seen.add(t.lower())
+                tokens.append(t)
+    return tokens
+
+
+def replace_token(text, old, new):
+    """
+    Replace every comma/newline-separated token equal to `old` with `new`,
+    leaving the rest of the text (order, other tokens) unchanged.
+    """
+    lines = []
+    for line in text.splitlines():
+        parts = line.split(",")
+        lines.append(",".join(
+            (p[:len(p) - len(p.lstrip())] + new) if p.strip() == old else p for p in parts
+        ))
+    return "\n".join(lines)
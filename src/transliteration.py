@@ -0,0 +1,151 @@
+# transliteration.py — Script detection and Devanagari → Latin transliteration
+#
+# The OCR reader is configured for English, Hindi and Marathi, so tokens can
+# arrive in Devanagari. The matcher uses detect_script() to route each token to
+# the right index and transliterate() to compare Devanagari spellings with the
+# Latin names in data/items.csv. The scheme is a simplified Hunterian one
+# (no diacritics, final schwa dropped), close to how Indian brand and chemical
+# names are written in English: "सोडियम बेंजोएट" -> "sodiyam benjoet".
+import unicodedata
+
+LATIN = "latin"
+DEVANAGARI = "devanagari"
+OTHER = "other"      # letters in a script we have no index for
+NO_LETTERS = "none"  # digits / punctuation only
+
+_ZERO_WIDTH = {"‌": None, "‍": None}  # ZWNJ / ZWJ (rendering hints only)
+
+_VOWELS = {
+    "अ": "a", "आ": "a", "इ": "i", "ई": "i", "उ": "u", "ऊ": "u", "ऋ": "ri",
+    "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au", "ऑ": "o", "ॲ": "a", "ऍ": "e",
+}
+_MATRAS = {
+    "ा": "a", "ि": "i", "ी": "i", "ु": "u", "ू": "u", "ृ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au", "ॉ": "o", "ॅ": "e",
+}
+_CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n",
+    "च": "ch", "छ": "chh", "ज": "j", "झ": "jh", "ञ": "n",
+    "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n",
+    "त": "t", "थ": "th", "द": "d", "ध": "dh", "न": "n",
+    "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m",
+    "य": "y", "र": "r", "ल": "l", "ळ": "l", "व": "v",
+    "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+}
+# Consonant + nukta (NFC keeps these decomposed): Perso-Arabic / English sounds
+_NUKTA_FORMS = {"क": "q", "ख": "kh", "ग": "g", "ज": "z", "ड": "r", "ढ": "rh", "फ": "f", "य": "y"}
+_NUKTA = "़"
+_VIRAMA = "्"
+_SIGNS = {"ं": "n", "ँ": "n", "ः": "h", "ऽ": "", "।": ",", "॥": ","}
+_DIGITS = {chr(0x0966 + d): str(d) for d in range(10)}
+
+
+def _is_devanagari(ch):
+    return "ऀ" <= ch <= "ॿ" or "꣠" <= ch <= "ꣿ"
+
+
+def detect_script(text):
+    """
+    Classify a token by the script of its letters.
+    Any Devanagari letter makes it DEVANAGARI (mixed "विटामिन C" still needs
+    transliterating); otherwise LATIN, OTHER, or NO_LETTERS.
+    """
+    latin = other = False
+    for ch in text:
+        if _is_devanagari(ch):
+            if ch.isalpha() or unicodedata.category(ch).startswith("M"):
+                return DEVANAGARI
+        elif ch.isalpha():
+            if ord(ch) < 0x250:  # Basic Latin through Latin Extended-B
+                latin = True
+            else:
+                other = True
+    if latin:
+        return LATIN
+    return OTHER if other else NO_LETTERS
+
+
+def normalize_devanagari(text):
+    """NFC, zero-width joiners removed, whitespace collapsed — the Devanagari index key."""
+    text = unicodedata.normalize("NFC", str(text)).translate(_ZERO_WIDTH)
+    return " ".join(text.split())
+
+
+def transliterate(text):
+    """
+    Transliterate Devanagari to lowercase Latin; other characters pass through.
+    :param text: Token such as "सोडियम बेंजोएट" or "विटामिन C"
+    :return: Latin string such as "sodiyam benjoet" or "vitamin c"
+    """
+    chars = normalize_devanagari(text)
+    out = []
+    i, n = 0, len(chars)
+    while i < n:
+        ch = chars[i]
+        if ch in _CONSONANTS:
+            if i + 1 < n and chars[i + 1] == _NUKTA:
+                out.append(_NUKTA_FORMS.get(ch, _CONSONANTS[ch]))
+                i += 1
+            else:
+                out.append(_CONSONANTS[ch])
+            nxt = chars[i + 1] if i + 1 < n else ""
+            if nxt in _MATRAS:
+                out.append(_MATRAS[nxt])
+                i += 1
+            elif nxt == _VIRAMA:
+                i += 1
+            elif nxt and (nxt in _CONSONANTS or nxt in _SIGNS and _SIGNS[nxt] == "n"):
+                # Inherent vowel inside a word (final schwa is dropped)
+                out.append("a")
+        elif ch in _VOWELS:
+            out.append(_VOWELS[ch])
+        elif ch in _MATRAS:  # stray matra (OCR split); keep its sound
+            out.append(_MATRAS[ch])
+        elif ch in _SIGNS:
+            sign = _SIGNS[ch]
+            # Anusvara before p/b/m is pronounced "m" (e.g. "कंपनी" -> "kampani")
+            if ch == "ं" and i + 1 < n and chars[i + 1] in ("प", "फ", "ब", "भ", "म"):
+                sign = "m"
+            out.append(sign)
+        elif ch in _DIGITS:
+            out.append(_DIGITS[ch])
+        elif ch not in (_NUKTA, _VIRAMA):
+            out.append(ch)
+        i += 1
+    return "".join(out).lower()
+
+
+# Spelling differences between English and transliterated Hindi/Marathi that
+# don't change the word: ph/f, sh/s, z/j, w/v, hard/soft c, aspirates, vowel quality.
+_KEY_DIGRAPHS = (("ph", "f"), ("ck", "k"), ("sh", "s"), ("kh", "k"), ("gh", "g"), ("jh", "j"),
+                 ("th", "t"), ("dh", "d"), ("bh", "b"), ("z", "j"), ("w", "v"),
+                 ("q", "k"), ("x", "ks"))
+_KEY_VOWELS = set("aeiouy")
+
+
+def phonetic_key(text):
+    """
+    Fold a Latin or transliterated name to a coarse sound key, so that
+    "Sodium Benzoate" and "sodiyam benjoet" both become "sadam banjat".
+    Vowel runs collapse to "a" and a word-final vowel is dropped.
+    """
+    words = []
+    for word in transliterate(text).split():
+        w = "".join(ch for ch in word if ch.isalnum())
+        for a, b in _KEY_DIGRAPHS:
+            w = w.replace(a, b)
+        # c is "s" before e/i/y, "k" otherwise (ch stays: chini, chloride differ anyway)
+        w = "".join(
+            ("s" if w[i + 1:i + 2] in ("e", "i", "y") else "k") if ch == "c" and w[i + 1:i + 2] != "h" else ch
+            for i, ch in enumerate(w)
+        )
+        key = []
+        for ch in w:
+            ch = "a" if ch in _KEY_VOWELS else ch
+            if not key or key[-1] != ch:  # collapse doubles and vowel runs
+                key.append(ch)
+        if len(key) > 2 and key[-1] == "a":
+            key.pop()
+        if key:
+            words.append("".join(key))
+    return " ".join(words)
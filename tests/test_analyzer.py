@@ -0,0 +1,101 @@
+# test_analyzer.py — display_analysis pagination and edit persistence (Streamlit AppTest)
+import json
+
+import pytest
+
+pytest.importorskip("streamlit")
+from streamlit.proto.WidgetStates_pb2 import WidgetStates  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+
+def _script():
+    import pandas as pd
+    import streamlit as st
+
+    from src.analyzer import display_analysis
+
+    df = pd.DataFrame({
+        "Ingredient": [f"item {n}" for n in range(130)],
+        "Category": "Preservative",
+        "Side Effects": "Minimal",
+        "Prescription Required": "No",
+    })
+    st.session_state["result"] = display_analysis(df, key="t", page_size=50)
+
+
+class _Editor:
+    """
+    Stands in for the browser side of st.data_editor: like the frontend, it keeps
+    the cumulative edits per rendered editor id and sends them on every rerun.
+    """
+    def __init__(self, at):
+        self.at = at
+        self.deltas = {}
+
+    def _editor_id(self):
+        ids = [n.proto.id for n in self.at.get("dataframe") if n.proto.id]
+        assert len(ids) == 1
+        return ids[0]
+
+    def run(self):
+        tree = self.at._tree
+        collect = tree.get_widget_states
+
+        def widget_states():
+            states = WidgetStates()
+            states.CopyFrom(collect())
+            editor_id = self._editor_id()
+            if editor_id in self.deltas:
+                state = states.widgets.add()
+                state.id = editor_id
+                state.string_value = json.dumps(self.deltas[editor_id])
+            return states
+
+        tree.get_widget_states = widget_states
+        self.at.run()
+
+    def edit(self, row, column, value):
+        delta = self.deltas.setdefault(
+            self._editor_id(), {"edited_rows": {}, "added_rows": [], "deleted_rows": []}
+        )
+        delta["edited_rows"].setdefault(str(row), {})[column] = value
+        self.run()
+
+    def page(self, n):
+        self.at.number_input(key=self.at.number_input[0].key).set_value(n)
+        self.run()
+
+
+@pytest.fixture
+def editor():
+    at = AppTest.from_function(_script)
+    at.run()
+    assert not at.exception
+    return _Editor(at)
+
+
+def _ingredients(editor):
+    return list(editor.at.session_state["result"]["Ingredient"])
+
+
+def test_consecutive_edits_on_one_page_are_all_kept(editor):
+    editor.edit(0, "Ingredient", "first")
+    editor.edit(1, "Ingredient", "second")
+    editor.edit(2, "Ingredient", "third")
+    editor.run()
+
+    assert _ingredients(editor)[:4] == ["first", "second", "third", "item 3"]
+    assert len(_ingredients(editor)) == 130
+
+
+def test_edits_survive_leaving_and_returning_to_a_page(editor):
+    editor.edit(0, "Ingredient", "kept")
+    editor.page(2)
+    editor.edit(0, "Ingredient", "page two")
+    editor.page(1)
+    editor.edit(1, "Ingredient", "after return")
+    editor.edit(2, "Ingredient", "and again")
+
+    names = _ingredients(editor)
+    assert names[:4] == ["kept", "after return", "and again", "item 3"]
+    assert names[50] == "page two"